@@ -0,0 +1,46 @@
+"""
+The BattleShips game engine.
+
+Importing the package doesn't import its modules: the names below are loaded from
+their module the first time they are used, so that a process only pays for what it needs.
+"""
+import importlib
+
+_EXPORTS = {
+    "Dot": "core", "Ship": "core", "Board": "core", "BoardException": "core", "BoardOutException": "core",
+    "BoardUsedException": "core", "BoardWrongShipException": "core", "ShotOutcome": "core",
+    "ShotFired": "events", "Hit": "events", "Sunk": "events", "Miss": "events", "InvalidShot": "events",
+    "GameOver": "events", "NULL_SINK": "events", "ListSink": "events", "BufferedConsoleSink": "events",
+    "TeeSink": "events",
+    "Metrics": "metrics", "enable_metrics": "metrics", "disable_metrics": "metrics", "percentile": "metrics",
+    "BoardRenderer": "render", "AnsiBoardView": "render",
+    "BitBoard": "bitboard",
+    "SparseBoard": "sparse",
+    "PlacementTable": "placement", "placement_table": "placement",
+    "FleetSolver": "solver",
+    "BatchedRandom": "rng", "game_rng": "rng", "stream_seed": "rng",
+    "TranspositionTable": "zobrist", "zobrist_keys": "zobrist",
+    "OpeningBook": "book",
+    "Player": "players", "AI": "players", "Human": "players", "TargetPool": "players", "HeatmapAI": "players",
+    "MonteCarloAI": "players", "EndgameAI": "players",
+    "STRATEGIES": "strategies", "load_strategy": "strategies",
+    "NumpyHeatmapAI": "numpy_players",
+    "Game": "game", "GameResult": "game", "Simulation": "game", "SimulationReport": "game",
+    "BoardPool": "pool",
+    "BatchEngine": "batch",
+    "ReplayWriter": "replay", "ReplayReader": "replay", "ReplayRecorder": "replay",
+    "Tournament": "tournament", "MatchReport": "tournament",
+    "BenchmarkSuite": "bench",
+    "GameServer": "server", "load_test": "server",
+}  # public name -> the module that defines it
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,291 @@
+"""
+Thousands of random games at once in NumPy arrays.
+"""
+import time
+
+from .bitboard import BitBoard
+from .core import Board
+from .game import Game, GameResult, SimulationReport
+from .placement import placement_table
+from .rng import BatchedRandom, stream_seed
+from .solver import FleetSolver
+
+try:
+    import numpy
+except ImportError:  # NumPy is optional, only the vectorized engines need it
+    numpy = None
+
+
+class BatchEngine:
+    """
+    Plays many games at once in NumPy arrays, in lockstep: every step fires one shot
+    in every unfinished game, and hits, sinks and game overs are detected for all of
+    them with a few array operations. The rules are the same as with Board: sinking a
+    ship strokes it, a hit grants another shot and a miss passes the turn.
+
+    Every lane holds one game with two boards, so the per-cell arrays are shaped
+    (lanes, 2, size, size): 'ships' holds the number of the ship on each cell (0 for
+    water), 'shots' the cells that can't be shot any more and 'hits' the hits.
+    A finished game is replaced at once by a new one from 'generator', a callable
+    returning a fleet layout as a list of (length, x, y, orientation); 'policy' picks
+    the cell to shoot for a set of lanes (random unshot cells by default).
+    Without a generator the fleets are laid out in bulk by gen_layouts(), 'bank' boards at a
+    time. Everything random comes from 'seed': the same seed plays the same games, but
+    the games share the streams of the run, so unlike Simulation one game can't be replayed alone.
+    'max_ships' is the most ships a board can hold, by default the most Game.gen_fleet can draw.
+    """
+
+    def __init__(self, lanes=1024, size=Board.MAX_COORD, seed=None, policy=None, generator=None, max_ships=None,
+                 bank=4096):
+        if numpy is None:
+            raise RuntimeError("BatchEngine needs NumPy installed")
+        self.lanes = lanes
+        self.size = size
+        self.cells = size * size
+        # two unrelated streams of the seed: the shots and layouts in NumPy, the fleets and the solver in Python
+        self.rng = numpy.random.default_rng(None if seed is None else stream_seed(seed, "batch"))
+        self.random = BatchedRandom(None if seed is None else stream_seed(seed, "fleets"))
+        self.policy = policy or BatchEngine.random_shots
+        self.generator = generator
+        self.game = Game.generator(size, rng=self.random)
+        self.max_ships = max_ships = max_ships or self.game.max_fleet()
+        self.bank = bank
+        self.bank_rows = numpy.zeros((0, max_ships), dtype=numpy.int64)  # layouts made ahead, used from the front
+        self.bank_lengths = numpy.zeros((0, max_ships), dtype=numpy.int16)
+
+        self.ships = numpy.zeros((lanes, 2, size, size), dtype=numpy.int16)
+        self.shots = numpy.zeros((lanes, 2, size, size), dtype=bool)
+        self.hits = numpy.zeros((lanes, 2, size, size), dtype=bool)
+        self._ships = self.ships.reshape(lanes, 2, self.cells)  # flat views of the same arrays
+        self._shots = self.shots.reshape(lanes, 2, self.cells)
+        self._hits = self.hits.reshape(lanes, 2, self.cells)
+
+        self.length = numpy.zeros((lanes, 2, max_ships), dtype=numpy.int16)
+        self.hp = numpy.zeros((lanes, 2, max_ships), dtype=numpy.int16)
+        self.stroke = numpy.zeros((lanes, 2, max_ships), dtype=numpy.int64)  # row of 'strokes' per ship
+        self.sink_move = numpy.zeros((lanes, 2, max_ships), dtype=numpy.int32)
+        self.order = numpy.zeros((lanes, 2, self.cells), dtype=numpy.int64)  # random shooting order of each board
+        self.cursor = numpy.zeros((lanes, 2), dtype=numpy.int64)  # position of the next shot in 'order'
+        self.fleet = numpy.zeros((lanes, 2), dtype=numpy.int16)
+        self.sunk = numpy.zeros((lanes, 2), dtype=numpy.int16)
+        self.turn = numpy.zeros(lanes, dtype=numpy.int8)  # the player shooting in each lane
+        self.first = numpy.zeros(lanes, dtype=numpy.int8)
+        self.moves = numpy.zeros(lanes, dtype=numpy.int32)
+        self.active = numpy.zeros(lanes, dtype=bool)
+
+        # body and body plus stroke of every placement, one per row; row 0 is empty and stands for "no ship"
+        self.bodies = numpy.zeros((1, self.cells), dtype=numpy.int16)
+        self.strokes = numpy.zeros((1, self.cells), dtype=bool)
+        self.row_offset = {}  # ship length -> the row of its first placement
+        self.rows = {}  # (length, x, y, orientation) -> row
+        self.results = []
+        self.started = self.target = 0
+
+    def gen_layout(self) -> list:
+        """
+        A random fleet placed like Game.gen_ships does, with the fleet solver taking over when that fails.
+        """
+        solver = FleetSolver(self.size, self.game.gen_fleet())
+        return solver.place_randomly(self.random) or solver.solve(shuffle=self.random.shuffle)
+
+    def gen_layouts(self, count, attempts=100):
+        """
+        'count' random fleet layouts as the rows of their placements in 'bodies' and 'strokes'
+        and the lengths of their ships, two arrays shaped (count, max_ships) padded with zeros.
+
+        The fleets come from Game.gen_fleet. The ships are placed like Game.gen_ships places
+        them, for all the layouts at once: longest first, each at a random placement whose body
+        is clear of the ships placed before it. A layout with a ship that finds no room in
+        'attempts' draws is made by gen_layout() instead.
+        """
+        lengths = numpy.zeros((count, self.max_ships), dtype=numpy.int16)
+        for n in range(count):
+            fleet = self.game.gen_fleet()
+            if len(fleet) > self.max_ships:
+                raise ValueError(f"{len(fleet)} ships don't fit in a BatchEngine with max_ships={self.max_ships}")
+            lengths[n, :len(fleet)] = sorted(fleet, reverse=True)
+
+        offset = numpy.zeros(int(lengths.max()) + 1, dtype=numpy.int64)  # length -> its first row; row 0 for no ship
+        number = numpy.ones(len(offset), dtype=numpy.int64)  # length -> its number of placements
+        for length in numpy.unique(lengths).tolist():
+            if length:
+                offset[length] = self.add_rows(length)
+                number[length] = len(placement_table(self.size, length))
+
+        rows = numpy.zeros((count, self.max_ships), dtype=numpy.int64)
+        blocked = numpy.zeros((count, self.cells), dtype=bool)
+        failed = numpy.zeros(count, dtype=bool)
+        for ship in range(int((lengths > 0).sum(axis=1).max())):
+            length = lengths[:, ship]
+            todo = numpy.flatnonzero((length > 0) & ~failed)
+            for _ in range(attempts):
+                if not todo.size:
+                    break
+                row = offset[length[todo]] + self.rng.integers(number[length[todo]])
+                clear = ~(self.bodies[row].astype(bool) & blocked[todo]).any(axis=1)
+                placed, row = todo[clear], row[clear]
+                rows[placed, ship] = row
+                blocked[placed] |= self.strokes[row]
+                todo = todo[~clear]
+            failed[todo] = True
+        for n in numpy.flatnonzero(failed).tolist():
+            rows[n], lengths[n] = self.layout_rows([self.gen_layout()])
+        return rows, lengths
+
+    def layouts(self, count):
+        """
+        The next 'count' layouts as gen_layouts() returns them: from 'generator' if there is
+        one, otherwise from the bank, which is refilled 'bank' layouts at a time.
+        """
+        if self.generator is not None:
+            return self.layout_rows([self.generator() for _ in range(count)])
+        if len(self.bank_rows) < count:
+            rows, lengths = self.gen_layouts(max(self.bank, count - len(self.bank_rows)))
+            self.bank_rows = numpy.concatenate([self.bank_rows, rows])
+            self.bank_lengths = numpy.concatenate([self.bank_lengths, lengths])
+        rows, self.bank_rows = self.bank_rows[:count], self.bank_rows[count:]
+        lengths, self.bank_lengths = self.bank_lengths[:count], self.bank_lengths[count:]
+        return rows, lengths
+
+    def add_rows(self, length) -> int:
+        """
+        Adds the rows of the placements of ships of 'length' to 'bodies' and 'strokes' on first use.
+        Returns the row of its first placement.
+        """
+        if length not in self.row_offset:
+            table = placement_table(self.size, length)
+            bodies = numpy.zeros((len(table), self.cells), dtype=numpy.int16)
+            strokes = numpy.zeros((len(table), self.cells), dtype=bool)
+            for i, (_, _, _, body, stroked) in enumerate(table):
+                bodies[i, list(BitBoard.bits(body))] = 1
+                strokes[i, list(BitBoard.bits(stroked))] = True
+            self.row_offset[length] = len(self.strokes)
+            self.bodies = numpy.concatenate([self.bodies, bodies])
+            self.strokes = numpy.concatenate([self.strokes, strokes])
+        return self.row_offset[length]
+
+    def row(self, length, x, y, orientation) -> int:
+        """
+        The row of a placement in 'bodies' and 'strokes', adding the rows of its length on first use.
+        """
+        row = self.rows.get((length, x, y, orientation))
+        if row is None:
+            row = self.add_rows(length) + placement_table(self.size, length).find(x, y, orientation)
+            self.rows[(length, x, y, orientation)] = row
+        return row
+
+    def layout_rows(self, layouts):
+        """
+        The rows and ship lengths of fleet layouts given as lists of (length, x, y, orientation).
+        """
+        count = len(layouts)
+        rows = numpy.zeros((count, self.max_ships), dtype=numpy.int64)  # row 0 is no ship at all
+        lengths = numpy.zeros((count, self.max_ships), dtype=numpy.int16)
+        for n, layout in enumerate(layouts):
+            if len(layout) > self.max_ships:
+                raise ValueError(f"{len(layout)} ships don't fit in a BatchEngine with max_ships={self.max_ships}")
+            rows[n, :len(layout)] = [self.rows.get(placement) or self.row(*placement) for placement in layout]
+            lengths[n, :len(layout)] = [placement[0] for placement in layout]
+        return rows, lengths
+
+    def load(self, lanes, boards, rows, lengths):
+        """
+        Sets up the boards (lanes[i], boards[i]) with the fleet layout of rows[i] and lengths[i].
+        """
+        count = len(rows)
+        numbers = numpy.arange(1, self.max_ships + 1, dtype=numpy.int16)
+        self._ships[lanes, boards] = (self.bodies[rows] * numbers[:, None]).sum(axis=1)
+        self._shots[lanes, boards] = False
+        self._hits[lanes, boards] = False
+        self.length[lanes, boards] = self.hp[lanes, boards] = lengths
+        self.stroke[lanes, boards] = rows
+        self.sink_move[lanes, boards] = 0
+        self.order[lanes, boards] = self.rng.permuted(numpy.tile(numpy.arange(self.cells), (count, 1)), axis=1)
+        self.cursor[lanes, boards] = 0
+        self.fleet[lanes, boards] = (lengths > 0).sum(axis=1)
+        self.sunk[lanes, boards] = 0
+
+    def start(self, lanes):
+        """
+        Starts the next games in the lanes; lanes left over when enough games were started go idle.
+        """
+        count = max(0, min(len(lanes), self.target - self.started))
+        self.active[lanes[count:]] = False
+        lanes = lanes[:count]
+        if not count:
+            return
+        self.load(numpy.repeat(lanes, 2), numpy.tile([0, 1], count), *self.layouts(2 * count))
+        self.first[lanes] = self.turn[lanes] = numpy.arange(self.started, self.started + count) % 2
+        self.moves[lanes] = 0
+        self.active[lanes] = True
+        self.started += count
+
+    def finish(self, lanes):
+        order = self.sink_move[lanes].argsort(axis=2, kind="stable")  # ships in the order they sank
+        sink_moves = numpy.take_along_axis(self.sink_move[lanes], order, axis=2).tolist()
+        lengths = numpy.take_along_axis(self.length[lanes], order, axis=2).tolist()
+        for i, (winner, first, moves) in enumerate(zip(self.turn[lanes].tolist(), self.first[lanes].tolist(),
+                                                       self.moves[lanes].tolist())):
+            sink_turns = tuple([(length, move) for length, move in zip(lengths[i][board], sink_moves[i][board]) if move]
+                               for board in (0, 1))
+            self.results.append(GameResult(winner, first, moves, sink_turns))
+        self.start(lanes)
+
+    @staticmethod
+    def random_shots(engine, lanes, boards):
+        """
+        The default policy: a random cell among those that can still be shot.
+
+        Every board gets a random order of its cells when it's loaded, and the policy takes
+        the next cell in that order that is still free: the rest of a random order is a random
+        order of the cells not visited yet, so the pick is uniform among the free cells.
+        """
+        cursor = engine.cursor[lanes, boards]
+        cells = engine.order[lanes, boards, cursor]
+        used = engine._shots[lanes, boards, cells]
+        while used.any():  # skip the cells stroked around sunk ships
+            cursor[used] += 1
+            cells[used] = engine.order[lanes[used], boards[used], cursor[used]]
+            used[used] = engine._shots[lanes[used], boards[used], cells[used]]
+        engine.cursor[lanes, boards] = cursor + 1
+        return cells
+
+    def step(self) -> int:
+        """
+        Fires one shot in every unfinished game. Returns the number of games that ended.
+        """
+        lanes = numpy.flatnonzero(self.active)
+        if not lanes.size:
+            return 0
+        boards = 1 - self.turn[lanes]
+        cells = self.policy(self, lanes, boards)
+
+        self._shots[lanes, boards, cells] = True
+        self.moves[lanes] += 1
+        ships = self._ships[lanes, boards, cells].astype(numpy.int64) - 1
+        hit = ships >= 0
+        self.turn[lanes[~hit]] ^= 1  # a miss passes the turn
+
+        lanes, boards, ships, cells = lanes[hit], boards[hit], ships[hit], cells[hit]
+        self._hits[lanes, boards, cells] = True
+        self.hp[lanes, boards, ships] -= 1
+
+        sunk = self.hp[lanes, boards, ships] == 0
+        lanes, boards, ships = lanes[sunk], boards[sunk], ships[sunk]
+        self._shots[lanes, boards] |= self.strokes[self.stroke[lanes, boards, ships]]
+        self.sunk[lanes, boards] += 1
+        self.sink_move[lanes, boards, ships] = self.moves[lanes]
+
+        over = lanes[self.sunk[lanes, boards] == self.fleet[lanes, boards]]
+        if over.size:
+            self.finish(over)
+        return len(over)
+
+    def run(self, games) -> SimulationReport:
+        started = time.perf_counter()
+        self.results = []
+        self.started, self.target = 0, games
+        self.start(numpy.arange(self.lanes))
+        while self.active.any():
+            self.step()
+        return SimulationReport(self.results, time.perf_counter() - started)
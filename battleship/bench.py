@@ -0,0 +1,165 @@
+"""
+The benchmark suite.
+"""
+import json
+import random
+import time
+import tracemalloc
+
+from .core import Board, BoardException, Dot
+from .game import Game, Simulation
+from .players import HeatmapAI
+from .solver import FleetSolver
+
+
+class BenchmarkSuite:
+    """
+    Times the hot paths of the game at several board sizes and keeps a JSON baseline.
+
+    Every case is run until it has taken 'min_time' seconds and reported in operations per
+    second; one untimed run before that, under tracemalloc, measures the most memory the
+    operation holds at once over what was allocated before it ('peak_kib'). The fleet is the
+    classic one (1x4, 2x3, 3x2, 4x1) scaled by the board area, so the cases are comparable from one size to the next.
+    A case regresses when it gets slower, or its peak grows, over the baseline by more
+    than 'threshold' (a fraction).
+    """
+    VERSION = 2
+
+    def __init__(self, sizes=(10, 20, 40), board_class=Board, min_time=0.2, only=None):
+        self.sizes = sizes
+        self.board_class = board_class
+        self.min_time = min_time
+        self.only = only  # names of the cases to run, all by default
+
+    @staticmethod
+    def fleet(size) -> list:
+        k = max(1, size * size // 100)
+        return [4] * k + [3] * 2 * k + [2] * 3 * k + [1] * 4 * k
+
+    def cases(self, size):
+        """
+        Yields (name, operation) for every case at this board size;
+        the operations are built here so that their setup isn't timed.
+        """
+        fleet = self.fleet(size)
+        game = Game.generator(size, self.board_class)
+        solver = FleetSolver(size, fleet)
+        layout = solver.solve()
+        board = solver.board(layout, self.board_class)
+        cells = [dot for row in Dot.table(size) for dot in row]
+        random.shuffle(cells)
+
+        yield "gen_ships", lambda: game.gen_ships(fleet)
+        yield "forced_gen_ships", lambda: game.forced_gen_ships(fleet)
+
+        def place_fleet():
+            empty = self.board_class(size=size)
+            for ship in ships:
+                empty.place_ship(ship)
+        ships = list(board.ships)
+        yield "place_ship (fleet)", place_fleet
+
+        stroked = solver.board(layout, self.board_class)  # a board of its own, stroke() marks cells
+
+        def stroke_fleet():
+            stroked.begin()
+            for ship in stroked.ships:
+                stroked.stroke(ship)
+        yield "stroke (fleet)", stroke_fleet
+
+        def shoot_board():
+            mark = board.snapshot()
+            for cell in cells:
+                if not board.game_over:
+                    try:
+                        board.shot(cell)
+                    except BoardException:
+                        pass
+            board.restore(mark)
+        yield "shot (board, undone)", shoot_board
+
+        shots = iter(())
+
+        def print_after_shot():
+            nonlocal shots
+            cell = next(shots, None)
+            if cell is None:
+                board.restore(0)
+                shots = iter(cells)
+                return
+            try:
+                board.make(cell)
+            except BoardException:
+                pass
+            str(board)
+        yield "__str__ (after a shot)", print_after_shot
+
+        simulation = Simulation((HeatmapAI, HeatmapAI), size, self.board_class)
+        yield "game (heatmap vs heatmap)", lambda: simulation.play_one()
+
+    def measure(self, operation) -> dict:
+        operation()  # warm the caches up
+        # the memory first, while the random draws still follow from the seed: the same run every time
+        tracemalloc.start()
+        try:
+            before, _ = tracemalloc.get_traced_memory()
+            operation()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        runs, elapsed = 0, 0.0
+        started = time.perf_counter()
+        while elapsed < self.min_time:
+            operation()
+            runs += 1
+            elapsed = time.perf_counter() - started
+        return {"ops_per_sec": runs / elapsed, "peak_kib": (peak - before) / 1024}
+
+    def run(self, progress=None) -> dict:
+        """
+        Runs the suite and returns {"<case>/<size>": measurements}.
+        'progress' is called with the name and the measurements of every case.
+        """
+        results = {}
+        for size in self.sizes:
+            random.seed(size)
+            for name, operation in self.cases(size):
+                if self.only and name.split()[0] not in self.only:
+                    continue
+                key = f"{name}/{size}"
+                results[key] = self.measure(operation)
+                if progress is not None:
+                    progress(key, results[key])
+        return results
+
+    def save(self, path, results):
+        with open(path, "w") as file:
+            json.dump({"version": self.VERSION, "board": self.board_class.__name__, "results": results},
+                      file, indent=2, sort_keys=True)
+
+    def load(self, path) -> dict:
+        with open(path) as file:
+            baseline = json.load(file)
+        if baseline.get("version") != self.VERSION:
+            raise ValueError(f"{path} is not a version {self.VERSION} benchmark baseline")
+        if baseline["board"] != self.board_class.__name__:
+            raise ValueError(f"{path} was measured with {baseline['board']}, not {self.board_class.__name__}")
+        return baseline["results"]
+
+    @staticmethod
+    def regressions(results, baseline, threshold=0.2) -> list:
+        """
+        A line for every case that is slower, or needs more memory at its peak,
+        than in the baseline by more than 'threshold'.
+        """
+        lines = []
+        for key, now in results.items():
+            then = baseline.get(key)
+            if then is None:
+                continue
+            if now["ops_per_sec"] < then["ops_per_sec"] * (1 - threshold):
+                lines.append(f"{key}: {now['ops_per_sec']:.1f} ops/sec, was {then['ops_per_sec']:.1f}")
+            if now["peak_kib"] > then["peak_kib"] * (1 + threshold) + 1:  # a KiB of slack for the smallest cases
+                lines.append(f"{key}: {now['peak_kib']:.1f} KiB peak, was {then['peak_kib']:.1f}")
+        return lines
@@ -0,0 +1,152 @@
+"""
+The bitmask board engine.
+"""
+from .core import Board, BoardOutException, BoardUsedException, BoardWrongShipException, Dot
+from .placement import placement_table
+from .zobrist import HIT, MISS
+
+
+class BitBoard(Board):
+    """
+    The same board and the same API as Board, but every set of cells is an integer bitmask
+    (cell (x, y) is bit number x * size + y), so placement checks, shots, strokes and
+    game_over are a handful of bit operations instead of scans over lists of Dots.
+
+    The masks of every ship come precomputed from the placement tables.
+    The console grid is still kept up to date, so printing the board works as before.
+    """
+
+    def __init__(self, hidden=False, size=Board.MAX_COORD, events=None):
+        self.ship_mask = 0  # cells occupied by ships
+        self.shot_mask = 0  # cells already shot at
+        self.hit_mask = 0  # shots that landed on a ship
+        self.halo_mask = 0  # single-cell strokes around the ships
+        self.blocked = 0  # the bitmask behind Board.occupied
+        self.ship_masks = {}  # ship -> its body mask, from the placement tables
+        self.ship_strokes = {}  # ship -> its body plus stroke mask
+        super().__init__(hidden, size, events)
+
+    @property
+    def occupied(self) -> set:
+        dots = Dot.table(self.size)
+        return {dots[i // self.size][i % self.size] for i in self.bits(self.blocked)}
+
+    @occupied.setter
+    def occupied(self, cells):
+        self.blocked = 0
+        for cell in cells:
+            self.blocked |= self.bit(cell)
+
+    def bit(self, cell) -> int:
+        return 1 << (cell.x * self.size + cell.y)
+
+    def used(self, cell) -> bool:
+        return bool(self.blocked & self.bit(cell))
+
+    def open_cells(self) -> list:
+        return list(self.bits(~self.blocked & ((1 << self.size * self.size) - 1)))
+
+    @staticmethod
+    def bits(mask):
+        """
+        Yields the numbers of the bits set in the mask, lowest first.
+        """
+        while mask:
+            low = mask & -mask
+            yield low.bit_length() - 1
+            mask ^= low
+
+    def stroke(self, ship, verb=False) -> int:
+        halo = self.ship_strokes[ship]
+        added = halo & ~self.blocked
+        if verb:
+            for i in self.bits(added):
+                self.paint(i // self.size, i % self.size, Board.ORIGIN_COLOR + ".")
+            if self.watchers:
+                self.rule_out(list(self.bits(added)))
+        self.blocked |= halo
+        return added
+
+    def place_ship(self, ship):
+        table = placement_table(self.size, ship.length)
+        i = table.find(ship.bow.x, ship.bow.y, ship.orientation)
+        if i == -1 or table[i][3] & self.blocked:
+            raise BoardWrongShipException()
+        _, _, _, mask, stroked = table[i]
+        for cell in ship.ship_body:
+            self.paint(cell.x, cell.y, Board.BLUE + "■" + Board.ORIGIN_COLOR)
+            self.owners[cell.x][cell.y] = ship
+
+        self.ships.append(ship)
+        self.ship_masks[ship] = mask
+        self.ship_strokes[ship] = stroked
+        self.ship_mask |= mask
+        self.blocked |= mask
+        self.halo_mask |= stroked
+        self.stroke(ship)
+
+    def make(self, cell) -> bool:
+        if self.off_grid(cell):
+            raise BoardOutException()
+
+        bit = self.bit(cell)
+        if self.blocked & bit:
+            raise BoardUsedException()
+
+        self.blocked |= bit
+        self.shot_mask |= bit
+        if self.watchers:
+            self.rule_out([cell.x * self.size + cell.y])
+
+        if not self.ship_mask & bit:
+            self.paint(cell.x, cell.y, ".")
+            self.journal.append((cell, None, None))
+            self.zobrist ^= self.keys[(cell.x * self.size + cell.y) * 3 + MISS]
+            return False
+
+        self.hit_mask |= bit
+        ship = self.owners[cell.x][cell.y]
+        mask = self.ship_masks[ship]
+        ship.hp -= 1
+        self.paint(cell.x, cell.y, Board.RED + "X" + Board.ORIGIN_COLOR)
+        self.zobrist ^= self.keys[(cell.x * self.size + cell.y) * 3 + HIT]
+
+        stroked = None
+        if self.hit_mask & mask == mask:
+            self.sunk_ships += 1
+            stroked = self.stroke(ship, verb=True)  # a mask here
+            self.hash_sink(ship)
+        self.journal.append((cell, ship, stroked))
+        return True
+
+    def unmake(self):
+        cell, ship, stroked = self.journal.pop()
+        self.zobrist ^= self.keys[(cell.x * self.size + cell.y) * 3 + (MISS if ship is None else HIT)]
+        bit = self.bit(cell)
+        if stroked is not None:
+            self.sunk_ships -= 1
+            self.hash_sink(ship)
+            for i in self.bits(stroked):
+                self.paint(i // self.size, i % self.size, "o")
+            self.blocked &= ~stroked
+            if self.watchers:
+                self.rule_in(list(self.bits(stroked)))
+        self.blocked &= ~bit
+        self.shot_mask &= ~bit
+        if self.watchers:
+            self.rule_in([cell.x * self.size + cell.y])
+        if ship is None:
+            self.paint(cell.x, cell.y, "o")
+        else:
+            self.hit_mask &= ~bit
+            ship.hp += 1
+            self.paint(cell.x, cell.y, Board.BLUE + "■" + Board.ORIGIN_COLOR)
+
+    def begin(self):
+        self.blocked = 0
+        self.journal = []
+        self.zobrist = 0
+
+    @property
+    def game_over(self) -> bool:
+        return self.hit_mask == self.ship_mask
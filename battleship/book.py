@@ -0,0 +1,136 @@
+"""
+The opening book: the first shots of the computer players, worked out ahead of time.
+"""
+import random
+import struct
+import sys
+from array import array
+
+from .bitboard import BitBoard
+from .core import Dot
+
+
+class OpeningBook:
+    """
+    The best first shots on an empty board, for every board size in the book.
+
+    A section of the book holds, for every state of knowledge reached in the first
+    'depth' shots of a game that follows the book, the cell to shoot next, keyed by the
+    Zobrist hash of the shots so far (Board.zobrist), so a player looks its next shot up
+    with nothing but the opponent's board. The best shot of a state is the cell that holds
+    a ship on the most boards among 'samples' boards of Game.gen_fleet and gen_ships that
+    agree with the state: the book follows the distribution of the fleets, not one fleet.
+
+    The file: a header (magic, version, number of sections), then every section as
+    size (u16), depth (u16), samples (u32) and the number of entries (u32), followed by
+    the hashes (u64 each, in order) and the cells (u16 each, u32 over 256x256). Little-endian.
+    A book made with a path only reads its file on the first lookup.
+    """
+    MAGIC = b"BSOB"
+    VERSION = 1
+    HEADER = struct.Struct("<4sBH")
+    SECTION = struct.Struct("<HHII")
+
+    def __init__(self, path=None):
+        self.path = path
+        self.sections = None if path is not None else {}  # size -> {hash: cell}, loaded by lookup()
+        self.info = {}  # size -> (depth, samples)
+
+    @staticmethod
+    def cell_typecode(size) -> str:
+        if size * size <= 65536:
+            return "H"
+        return "L" if array("L").itemsize == 4 else "I"
+
+    def lookup(self, size, key) -> int:
+        """
+        The cell number to shoot in the state of knowledge hashed as 'key', or -1.
+        """
+        if self.sections is None:
+            self.load()
+        section = self.sections.get(size)
+        return -1 if section is None else section.get(key, -1)
+
+    def load(self):
+        with open(self.path, "rb") as file:
+            data = file.read()
+        magic, version, count = self.HEADER.unpack_from(data.ljust(self.HEADER.size, b"\0"), 0)
+        if magic != self.MAGIC or version != self.VERSION:
+            raise ValueError(f"{self.path} is not a version {self.VERSION} opening book")
+        offset = self.HEADER.size
+        sections = {}
+        for _ in range(count):
+            size, depth, samples, entries = self.SECTION.unpack_from(data, offset)
+            offset += self.SECTION.size
+            hashes = array("Q", data[offset:offset + 8 * entries])
+            offset += 8 * entries
+            cells = array(self.cell_typecode(size))
+            cells.frombytes(data[offset:offset + cells.itemsize * entries])
+            offset += cells.itemsize * entries
+            if sys.byteorder == "big":
+                hashes.byteswap()
+                cells.byteswap()
+            sections[size] = dict(zip(hashes, cells))
+            self.info[size] = (depth, samples)
+        self.sections = sections
+
+    def save(self, path):
+        if self.sections is None:
+            self.load()
+        parts = [self.HEADER.pack(self.MAGIC, self.VERSION, len(self.sections))]
+        for size, section in sorted(self.sections.items()):
+            depth, samples = self.info[size]
+            keys = sorted(section)
+            hashes = array("Q", keys)
+            cells = array(self.cell_typecode(size), (section[key] for key in keys))
+            if sys.byteorder == "big":
+                hashes.byteswap()
+                cells.byteswap()
+            parts.append(self.SECTION.pack(size, depth, samples, len(keys)))
+            parts.append(hashes.tobytes())
+            parts.append(cells.tobytes())
+        with open(path, "wb") as file:
+            file.write(b"".join(parts))
+
+    def build(self, size, depth=6, samples=4000, min_samples=50, rng=random):
+        """
+        Works out the section of the book for size x size boards, replacing any it had.
+
+        'samples' boards are generated like the game does, then the book is grown from
+        the empty board: the best shot of a state is made on all the boards in that state,
+        which are grouped by the state they end up in, and every group of at least
+        'min_samples' boards is a state of the book in turn, down to 'depth' shots.
+        """
+        from .game import Game  # only building a book needs the game, not reading one
+        if self.sections is None:
+            self.load()
+        generator = Game.generator(size, BitBoard, rng)
+        boards = [generator.forced_gen_ships() for _ in range(samples)]
+        dots = Dot.table(size)
+        section = {}
+
+        def expand(group, shots):
+            counts = [0] * (size * size)
+            for board in group:
+                for c in BitBoard.bits(board.ship_mask & ~board.blocked):
+                    counts[c] += 1
+            best = max(range(size * size), key=counts.__getitem__)
+            if not counts[best]:
+                return
+            section[group[0].zobrist] = best
+            if shots + 1 == depth:
+                return
+            cell = dots[best // size][best % size]
+            following = {}  # Zobrist hash -> the boards in that state after the shot
+            for board in group:
+                board.make(cell)
+                following.setdefault(board.zobrist, []).append(board)
+            for boards_after in following.values():
+                if len(boards_after) >= min_samples:
+                    expand(boards_after, shots + 1)
+            for board in group:
+                board.unmake()
+
+        expand(boards, 0)
+        self.sections[size] = section
+        self.info[size] = (depth, samples)
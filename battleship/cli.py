@@ -0,0 +1,292 @@
+"""
+The command line. Every subcommand imports only the modules it needs, so that
+short-lived headless processes start quickly.
+"""
+import argparse
+import os
+import signal
+import sys
+
+from .core import Board
+from .strategies import STRATEGIES, load_strategy
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="BattleShips game")
+    parser.add_argument("--metrics", action="store_true", help="print a summary of the instrumentation at the end")
+    parser.add_argument("--metrics-json", metavar="PATH", help="write the instrumentation to PATH as JSON at the end")
+    parser.add_argument("--book", metavar="PATH", help="answer the first shots of the computer players from this opening book")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("play", help="play against the AI (default)")
+    simulate_parser = commands.add_parser("simulate", help="play AI vs AI games headless")
+    simulate_parser.add_argument("-n", "--games", type=int, default=1000)
+    simulate_parser.add_argument("-s", "--size", type=int, default=Board.MAX_COORD)
+    simulate_parser.add_argument("--bitboard", action="store_true", help="use the bitmask board engine")
+    simulate_parser.add_argument("--sparse", action="store_true", help="use the sparse board for very large grids")
+    simulate_parser.add_argument("-p", "--players", nargs=2, choices=sorted(STRATEGIES), default=["random", "random"])
+    simulate_parser.add_argument("--pool", type=int, default=0, metavar="CAPACITY",
+                                 help="take boards from a background pool with this many boards per fleet")
+    simulate_parser.add_argument("--watch", action="store_true", help="draw the games on the terminal")
+    simulate_parser.add_argument("--record", metavar="PATH", help="append the games to a replay log")
+    simulate_parser.add_argument("--uniform", action="store_true",
+                                 help="draw the layouts uniformly among all valid layouts of the fleets (slower)")
+    simulate_parser.add_argument("--batch", type=int, default=0, metavar="LANES",
+                                 help="random vs random games in the NumPy batch engine, LANES games at a time")
+    simulate_parser.add_argument("--seed", type=int,
+                                 help="give every game its own random stream from this seed (with --batch, seed the run)")
+    simulate_parser.add_argument("--start", type=int, default=0, metavar="GAME",
+                                 help="the number of the first game, to play games of a seeded run again")
+    replay_parser = commands.add_parser("replay", help="read a replay log")
+    replay_parser.add_argument("path")
+    replay_parser.add_argument("--watch", type=int, metavar="GAME", help="play the game number GAME again")
+    serve_parser = commands.add_parser("serve", help="host games against the AI over the network")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8765)
+    serve_parser.add_argument("--unix", metavar="PATH", help="listen on a Unix socket instead")
+    serve_parser.add_argument("-s", "--size", type=int, default=Board.MAX_COORD)
+    serve_parser.add_argument("--strategy", choices=sorted(STRATEGIES), default="heatmap")
+    serve_parser.add_argument("--idle", type=float, default=300.0, help="seconds before an idle session is closed")
+    serve_parser.add_argument("--pool", type=int, default=0, metavar="CAPACITY",
+                              help="take boards from a background pool with this many boards per fleet")
+    loadtest_parser = commands.add_parser("loadtest", help="play many simulated clients against a server")
+    loadtest_parser.add_argument("--host", default="127.0.0.1")
+    loadtest_parser.add_argument("--port", type=int, default=8765)
+    loadtest_parser.add_argument("--unix", metavar="PATH", help="connect to a Unix socket instead")
+    loadtest_parser.add_argument("-c", "--clients", type=int, default=1000)
+    loadtest_parser.add_argument("--concurrency", type=int, default=500, help="connections open at the same time")
+    bench_parser = commands.add_parser("bench", help="time the hot paths and compare them to a baseline")
+    bench_parser.add_argument("-s", "--sizes", type=int, nargs="+", default=[10, 20, 40])
+    bench_parser.add_argument("--bitboard", action="store_true", help="use the bitmask board engine")
+    bench_parser.add_argument("--only", nargs="+", metavar="CASE", help="run only these cases, e.g. shot gen_ships")
+    bench_parser.add_argument("--min-time", type=float, default=0.2, help="seconds spent on every case")
+    bench_parser.add_argument("--baseline", metavar="PATH", help="the JSON baseline to compare to")
+    bench_parser.add_argument("--save", action="store_true", help="write the results to the baseline instead")
+    bench_parser.add_argument("--threshold", type=float, default=0.2, help="the slowdown that counts as a regression")
+    tournament_parser = commands.add_parser("tournament", help="compare AI strategies on many games")
+    tournament_parser.add_argument("strategies", nargs="+", choices=sorted(STRATEGIES))
+    tournament_parser.add_argument("-n", "--games", type=int, default=1000, help="games per pair of strategies")
+    tournament_parser.add_argument("-s", "--size", type=int, default=Board.MAX_COORD)
+    tournament_parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1)
+    tournament_parser.add_argument("--seed", type=int, default=0)
+    book_parser = commands.add_parser("book", help="work out the opening book of the computer players")
+    book_parser.add_argument("path", help="the book to write; the sections of other sizes in it are kept")
+    book_parser.add_argument("-s", "--sizes", type=int, nargs="+", default=[Board.MAX_COORD])
+    book_parser.add_argument("-d", "--depth", type=int, default=6, help="the number of shots the book plays")
+    book_parser.add_argument("--samples", type=int, default=4000, help="the boards generated per size")
+    book_parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    if args.book:
+        from .book import OpeningBook
+        from .players import AI
+        AI.book = OpeningBook(args.book)  # read on the first lookup
+    if args.metrics or args.metrics_json:
+        from .metrics import enable_metrics
+        metrics = enable_metrics()
+        if hasattr(signal, "SIGUSR1"):  # kill -USR1 <pid> prints the summary so far
+            signal.signal(signal.SIGUSR1, lambda *_: print(metrics.summary(), file=sys.stderr))
+        try:
+            run(args, parser)
+        finally:
+            if args.metrics:
+                print(metrics.summary(), file=sys.stderr)
+            if args.metrics_json:
+                import json
+                with open(args.metrics_json, "w") as file:
+                    json.dump(metrics.snapshot(), file, indent=2)
+    else:
+        run(args, parser)
+
+
+def run(args, parser):
+    command = COMMANDS.get(args.command, play)
+    command(args, parser)
+
+
+def play(args, parser):
+    from .game import Game
+    Game().start()
+
+
+def check_size(size, parser):
+    """
+    Fails with a usage error on boards too small for any fleet, instead of in the middle of a run.
+    """
+    from .game import Game
+    try:
+        Game.generator(size).gen_fleet()
+    except ValueError as e:
+        parser.error(str(e))
+
+
+def simulate(args, parser):
+    from .bitboard import BitBoard
+    check_size(args.size, parser)
+    if args.uniform and (args.batch or args.pool):
+        parser.error("--uniform draws the boards of a Simulation; --batch and --pool place their own")
+    if args.batch:
+        if args.start:
+            parser.error("--start replays games of a Simulation; the games of --batch share the streams of the run")
+        from .batch import BatchEngine
+        print(BatchEngine(args.batch, args.size, seed=args.seed).run(args.games))
+        return
+
+    from .game import Simulation
+    board_class = BitBoard if args.bitboard else Board
+    if args.sparse:
+        from .sparse import SparseBoard
+        board_class = SparseBoard
+    pool = None
+    if args.pool:
+        from .pool import BoardPool
+        pool = BoardPool(args.pool, board_class=board_class).start()
+    players = tuple(load_strategy(name) for name in args.players)
+    writer = recorder = None
+    if args.record:
+        from .replay import ReplayRecorder, ReplayWriter
+        writer = ReplayWriter(args.record)
+        recorder = ReplayRecorder(writer)
+    simulation = Simulation(players, args.size, board_class, pool, recorder=recorder, seed=args.seed,
+                            uniform=args.uniform)
+    if args.watch:
+        simulation.watch(args.games, start=args.start)
+    else:
+        print(simulation.run(args.games, args.start))
+    if writer is not None:
+        writer.close()
+    if pool is not None:
+        pool.stop()
+        print(f"Board pool: {pool.hits} hits, {pool.misses} misses")
+
+
+def replay(args, parser):
+    import itertools
+    import time
+
+    from .render import AnsiBoardView
+    from .replay import ReplayReader, replay
+
+    try:
+        reader = ReplayReader(args.path)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    with reader:
+        if args.watch is None:
+            games = shots = 0
+            for game in reader:
+                games += 1
+                shots += len(game.shots)
+            print(f"{games} games, {shots / games if games else 0:.1f} shots per game")
+            return
+
+        game = next(itertools.islice(reader, args.watch, None), None) if args.watch >= 0 else None
+        if game is None:
+            parser.error(f"{args.path} has {len(reader)} games, numbered from 0: there is no game {args.watch}")
+        views = []
+
+        def draw(boards, moves):
+            if not views:
+                sys.stdout.write("\033[2J")
+                views.extend(AnsiBoardView(board, top=2, left=1 + i * (3 * game.size + 4))
+                             for i, board in enumerate(boards))
+            sys.stdout.write(f"\033[1;1HMove {moves}")
+            for view in views:
+                view.draw()
+            time.sleep(0.05)
+
+        replay(game, on_move=draw)
+
+
+def serve(args, parser):
+    import asyncio
+
+    from .bitboard import BitBoard
+    from .server import GameServer
+
+    pool = None
+    if args.pool:
+        from .pool import BoardPool
+        pool = BoardPool(args.pool, board_class=BitBoard).start()
+    server = GameServer(load_strategy(args.strategy), args.size, pool=pool, idle_timeout=args.idle)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        print(f"{server.games} games played")
+
+
+def loadtest(args, parser):
+    import asyncio
+
+    from .server import load_test
+    print(asyncio.run(load_test(args.host, args.port, args.unix, args.clients, args.concurrency)))
+
+
+def bench(args, parser):
+    from .bench import BenchmarkSuite
+    from .bitboard import BitBoard
+
+    suite = BenchmarkSuite(args.sizes, BitBoard if args.bitboard else Board, args.min_time, args.only)
+
+    def progress(key, result):
+        print(f"{key:36} {result['ops_per_sec']:12.1f} ops/sec {result['peak_kib']:10.1f} KiB peak")
+
+    results = suite.run(progress)
+    if args.baseline and args.save:
+        suite.save(args.baseline, results)
+    elif args.baseline and os.path.exists(args.baseline):
+        try:
+            baseline = suite.load(args.baseline)
+        except ValueError as e:
+            parser.error(str(e))
+        regressions = suite.regressions(results, baseline, args.threshold)
+        for line in regressions:
+            print(f"Regression: {line}")
+        if regressions:
+            sys.exit(1)
+
+
+def tournament(args, parser):
+    import time
+
+    from .tournament import Tournament
+
+    check_size(args.size, parser)
+    if args.games < 1:
+        parser.error("--games must be at least 1")
+    strategies = {name: load_strategy(name) for name in args.strategies}
+    started = time.perf_counter()
+
+    def progress(done, total, names):
+        rate = done / (time.perf_counter() - started)
+        print(f"\r{done}/{total} games ({rate:.1f} games/sec)", end="", flush=True)
+
+    reports = Tournament(strategies, args.games, args.size, workers=args.workers, seed=args.seed).run(progress)
+    print()
+    for report in reports:
+        print(report)
+
+
+def book(args, parser):
+    import random
+
+    from .book import OpeningBook
+    opening_book = OpeningBook(args.path if os.path.exists(args.path) else None)
+    rng = random.Random(args.seed)
+    for size in args.sizes:
+        try:
+            opening_book.build(size, args.depth, args.samples, rng=rng)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"{size}x{size}: {len(opening_book.sections[size])} positions")
+    opening_book.save(args.path)
+
+
+COMMANDS = {
+    "play": play,
+    "simulate": simulate,
+    "replay": replay,
+    "serve": serve,
+    "loadtest": loadtest,
+    "bench": bench,
+    "tournament": tournament,
+    "book": book,
+}  # subcommand -> function(args, parser); no subcommand plays
@@ -0,0 +1,432 @@
+"""
+The board, its ships and cells.
+"""
+from enum import Enum
+
+from . import metrics
+from .events import NULL_SINK, Hit, InvalidShot, Miss, ShotFired, Sunk
+from .zobrist import HIT, MISS, SUNK, zobrist_keys
+
+
+class Dot:
+    """
+    An immutable pair of board coordinates.
+
+    Dots are interned: Dot(x, y) returns the same object every time for the same pair,
+    so building them is a dictionary lookup and they can be used in sets and as dict keys.
+    Only the coordinates below INTERNED are interned, so the pool never holds more than
+    INTERNED ** 2 dots: the dots of bigger boards are made on every call, compare equal
+    all the same and are freed with the boards that hold them.
+    Dot.table(size) gives the ready-made dots of a whole board.
+    """
+    __slots__ = ("x", "y", "_hash")
+    INTERNED = 128
+    _pool = {}  # (x, y) -> Dot
+    _tables = {}  # board size -> rows of Dots
+
+    def __new__(cls, x, y):
+        dot = cls._pool.get((x, y))
+        if dot is None:
+            dot = object.__new__(cls)
+            object.__setattr__(dot, "x", x)
+            object.__setattr__(dot, "y", y)
+            object.__setattr__(dot, "_hash", hash((x, y)))
+            if 0 <= x < cls.INTERNED and 0 <= y < cls.INTERNED:
+                cls._pool[(x, y)] = dot
+        return dot
+
+    @classmethod
+    def table(cls, size) -> list:
+        """
+        Returns the interned dots of a size x size board as a list of rows: table[x][y].
+        """
+        rows = cls._tables.get(size)
+        if rows is None:
+            rows = cls._tables[size] = [[cls(x, y) for y in range(size)] for x in range(size)]
+        return rows
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Dot is immutable")
+
+    def __eq__(self, other) -> bool:
+        if self is other:
+            return True
+        if not isinstance(other, Dot):
+            return NotImplemented
+        return self.x == other.x and self.y == other.y
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __reduce__(self):
+        return Dot, (self.x, self.y)  # unpickled dots are interned again
+
+    def __repr__(self) -> str:
+        return f"Dot({self.x}, {self.y})"
+
+
+class BoardException(Exception):
+    pass
+
+
+class BoardOutException(BoardException):
+    def __str__(self):
+        return "Your shot will land outside the board!"
+
+
+class BoardUsedException(BoardException):
+    def __str__(self):
+        return "You've already shot here!"
+
+
+class BoardWrongShipException(BoardException):
+    """
+    This exception happens when the placement of a ship does not conform
+    with the rules of the game (partially or entirely outside the board,
+    or too close to another ship that had already been placed.
+
+    Has no console representation, used internally.)
+    """
+    pass
+
+
+class ShotOutcome(Enum):
+    """
+    What became of a shot fired with Board.fire().
+    """
+    INVALID = "invalid"  # outside the board
+    REPEAT = "repeat"  # at a cell already shot at or stroked
+    MISS = "miss"
+    HIT = "hit"
+    SUNK = "sunk"
+
+    @property
+    def valid(self) -> bool:
+        return self is not ShotOutcome.INVALID and self is not ShotOutcome.REPEAT
+
+    @property
+    def hit(self) -> bool:
+        """
+        Whether the shot landed on a ship, which grants another move.
+        """
+        return self is ShotOutcome.HIT or self is ShotOutcome.SUNK
+
+
+class Ship:
+
+    def __init__(self, length, bow, orientation) -> None:
+        self.length = self.hp = length
+        self.bow = bow
+        self.orientation = orientation
+        self._body = self.build_body()  # the cells never change, so they are computed once
+        self._cells = frozenset(self._body)
+
+    def build_body(self) -> tuple:
+        ship_cells = []
+        for i in range(self.length):  # in a loop, builds a ship, marking the board dots as occupied
+            current_x = self.bow.x
+            current_y = self.bow.y
+
+            if self.orientation == 0:  # 'Hor':
+                current_x += i
+            elif self.orientation == 1:  # 'Vert':
+                current_y += i
+
+            ship_cells.append(Dot(current_x, current_y))
+
+        return tuple(ship_cells)  # cells' coordinates occupied by the constructed ship
+
+    @property
+    def ship_body(self) -> tuple:
+        """
+        Returns all cells occupied by a ship
+        """
+        return self._body
+
+    def hit(self, shot) -> bool:
+        """
+        Returns whether or not a ship was hit by a shot (if a shot landed on a cell occupied by a ship)
+        """
+        return shot in self._cells
+
+
+class Board:
+    MAX_COORD = 10  # Size of the game board (no more than 10 to keep it nice and tidy).
+    BLUE = "\033[34m"
+    RED = "\033[31m"
+    ORIGIN_COLOR = "\033[0m"
+
+    def __init__(self, hidden=False, size=MAX_COORD, events=None):
+        self.size = size
+        self.hidden = hidden
+        self.events = events or NULL_SINK  # where the outcome of every shot is reported
+
+        self.sunk_ships = 0  # The number of ships that were sunk
+        self.grid = self.new_grid("o")  # The actual board grid in the console
+        self.occupied = set()  # Cells either occupied by a ship or already shot at
+        self.ships = []
+        self.owners = self.new_grid(None)  # The ship on each cell, if any
+        self.row_versions = [0] * size  # bumped every time a row of the grid is painted
+        self.window = (0, 0, size, size)  # the region printed: top row, left column, height, width
+        self.renderer = None  # created on the first print
+        self.journal = []  # (cell, ship or None, cells stroked if sunk) for every shot, see make()
+        self.watchers = []  # told about the cells that shots rule out and unmake() rules back in, see rule_out()
+        self.keys = self.zobrist_keys()
+        self.zobrist = 0  # the Zobrist hash of the shots: misses, hits and sunk ships, see hash_sink()
+
+    def __str__(self):
+        if self.renderer is None or self.renderer.window != self.window:
+            from .render import BoardRenderer  # imported here, the renderer module imports this one
+            self.renderer = BoardRenderer(self, self.window)
+        with metrics.METRICS.phase("render"):
+            return self.renderer.render(self.hidden)
+
+    def view(self, top=0, left=0, height=None, width=None, hidden=None) -> str:
+        """
+        Renders a region of the board: 'height' rows from 'top' and 'width' columns
+        from 'left' (up to the edges of the board by default).
+        """
+        from .render import BoardRenderer
+        height = self.size - top if height is None else min(height, self.size - top)
+        width = self.size - left if width is None else min(width, self.size - left)
+        return BoardRenderer(self, (top, left, height, width)).render(self.hidden if hidden is None else hidden)
+
+    def zobrist_keys(self):
+        """
+        The Zobrist keys of the states of the cells, see zobrist.py.
+        """
+        return zobrist_keys(self.size)
+
+    def new_grid(self, default) -> list:
+        """
+        A size x size grid of 'default', indexed as grid[x][y].
+        """
+        return [[default] * self.size for _ in range(self.size)]
+
+    def row_cells(self, x, left, width) -> list:
+        """
+        The grid values of 'width' cells of row x from column 'left'.
+        """
+        return self.grid[x][left:left + width]
+
+    def paint(self, x, y, value):
+        """
+        Changes a cell of the grid; every change to the grid goes through here
+        so that the renderers know which rows to draw again.
+        """
+        self.grid[x][y] = value
+        self.row_versions[x] += 1
+
+    def off_grid(self, cell) -> bool:
+        """
+        Verifies that the given dot is not outside the board.
+        """
+        return not ((0 <= cell.x < self.size) and (0 <= cell.y < self.size))
+
+    def used(self, cell) -> bool:
+        """
+        Whether the cell was already shot at or stroked.
+        """
+        return cell in self.occupied
+
+    def open_cells(self) -> list:
+        """
+        The numbers (x * size + y) of the cells that can still be shot at.
+        """
+        size = self.size
+        used = {cell.x * size + cell.y for cell in self.occupied}
+        return [c for c in range(size * size) if c not in used]
+
+    def rule_out(self, numbers):
+        """
+        Tells the watchers that these cells (numbered x * size + y) can't be shot at any more.
+        """
+        for watcher in self.watchers:
+            watcher.rule_out(numbers)
+
+    def rule_in(self, numbers):
+        """
+        Tells the watchers that these cells can be shot at again.
+        """
+        for watcher in self.watchers:
+            watcher.rule_in(numbers)
+
+    def stroke(self, ship, verb=False):
+        """
+        Creates a single-cell stroke around each ship and toggles all the board cells
+        that belong to this stroke as 'occupied.' Returns the cells that weren't occupied yet.
+
+        "verb" arg is for 'verbose' i.e. toggles the visibility of occupied property.
+        """
+        shifts = [
+            (-1, -1), (-1, 0), (-1, 1),
+            (0, -1), (0, 0), (0, 1),
+            (1, -1), (1, 0), (1, 1)
+        ]
+
+        size = self.size
+        added = []
+        for cell in ship.ship_body:
+            for dx, dy in shifts:
+                x, y = cell.x + dx, cell.y + dy
+                if not (0 <= x < size and 0 <= y < size):  # checked before making a dot that would be thrown away
+                    continue
+                current = Dot(x, y)
+                if current not in self.occupied:
+                    if verb:
+                        self.paint(current.x, current.y, Board.ORIGIN_COLOR + ".")
+                    self.occupied.add(current)
+                    added.append(current)
+        if verb and self.watchers:
+            self.rule_out([cell.x * self.size + cell.y for cell in added])
+        return added
+
+    def place_ship(self, ship):
+        for cell in ship.ship_body:
+            if self.off_grid(cell) or cell in self.occupied:
+                raise BoardWrongShipException()
+        for cell in ship.ship_body:
+            self.paint(cell.x, cell.y, Board.BLUE + "■" + Board.ORIGIN_COLOR)
+            self.occupied.add(cell)
+            self.owners[cell.x][cell.y] = ship
+
+        self.ships.append(ship)
+        self.stroke(ship)
+
+    def shot(self, cell) -> bool:
+        """
+        Make a shot at a ship and returns yes/no to the 'Player.move" method.
+        """
+        self.events.emit(ShotFired(self, cell))
+        repeat = self.make(cell)
+        self.report(cell)
+        return repeat
+
+    def fire(self, cell) -> ShotOutcome:
+        """
+        Makes a shot like shot(), but a shot that can't be made is returned as
+        ShotOutcome.INVALID or ShotOutcome.REPEAT (and reported as InvalidShot) instead
+        of raising, so a player that guesses wrong doesn't pay for an exception every time.
+        """
+        self.events.emit(ShotFired(self, cell))
+        if self.off_grid(cell):
+            self.events.emit(InvalidShot(self, cell, BoardOutException()))
+            return ShotOutcome.INVALID
+        if self.used(cell):
+            self.events.emit(InvalidShot(self, cell, BoardUsedException()))
+            return ShotOutcome.REPEAT
+        self.make(cell)
+        return self.report(cell)
+
+    def report(self, cell) -> ShotOutcome:
+        """
+        Emits the outcome of the shot that was just made at the cell.
+        """
+        ship = self.journal[-1][1]
+        if ship is None:
+            self.events.emit(Miss(self, cell))
+            return ShotOutcome.MISS
+        if ship.hp == 0:
+            self.events.emit(Sunk(self, cell, ship))
+            return ShotOutcome.SUNK
+        self.events.emit(Hit(self, cell, ship))
+        return ShotOutcome.HIT
+
+    def make(self, cell) -> bool:
+        """
+        Applies a shot without reporting it and writes it down in the journal,
+        so that unmake() can take it back. Raises the same exceptions as shot().
+        """
+        if self.off_grid(cell):
+            raise BoardOutException()
+            # if the attempt is outside the board, raise the exception.
+
+        if cell in self.occupied:
+            raise BoardUsedException()
+            # if this is the second shot at this cell, raise the exception.
+
+        self.occupied.add(cell)  # add this cell to the occupied set
+        if self.watchers:
+            self.rule_out([cell.x * self.size + cell.y])
+
+        ship = self.owners[cell.x][cell.y]  # see if the cell belongs to a ship
+        if ship is None:
+            self.paint(cell.x, cell.y, ".")
+            self.journal.append((cell, None, None))
+            self.zobrist ^= self.keys[(cell.x * self.size + cell.y) * 3 + MISS]
+            return False
+
+        ship.hp -= 1
+        self.paint(cell.x, cell.y, Board.RED + "X" + Board.ORIGIN_COLOR)
+        self.zobrist ^= self.keys[(cell.x * self.size + cell.y) * 3 + HIT]
+        stroked = None
+        if ship.hp == 0:
+            self.sunk_ships += 1
+            # if sunk, stroke the ship so we don't shoot there again
+            stroked = self.stroke(ship, verb=True)
+            self.hash_sink(ship)
+        self.journal.append((cell, ship, stroked))
+        return True
+
+    def hash_sink(self, ship):
+        """
+        Turns the hits on a ship into a sunk ship in the Zobrist hash, or back: every shot
+        XORs the key of what it revealed into the hash, and unmake() XORs it out again.
+        """
+        keys = self.keys
+        for part in ship.ship_body:
+            p = (part.x * self.size + part.y) * 3
+            self.zobrist ^= keys[p + HIT] ^ keys[p + SUNK]
+
+    def unmake(self):
+        """
+        Takes back the last shot made, as if it never happened.
+        """
+        cell, ship, stroked = self.journal.pop()
+        self.zobrist ^= self.keys[(cell.x * self.size + cell.y) * 3 + (MISS if ship is None else HIT)]
+        if stroked is not None:
+            self.sunk_ships -= 1
+            self.hash_sink(ship)
+            for current in stroked:
+                self.occupied.discard(current)
+                self.paint(current.x, current.y, "o")
+            if self.watchers:
+                self.rule_in([current.x * self.size + current.y for current in stroked])
+        self.occupied.discard(cell)
+        if self.watchers:
+            self.rule_in([cell.x * self.size + cell.y])
+        if ship is None:
+            self.paint(cell.x, cell.y, "o")
+        else:
+            ship.hp += 1
+            self.paint(cell.x, cell.y, Board.BLUE + "■" + Board.ORIGIN_COLOR)
+
+    def snapshot(self) -> int:
+        """
+        A mark to restore() the board to later: the depth of the journal.
+        """
+        return len(self.journal)
+
+    def restore(self, mark):
+        """
+        Takes back every shot made since snapshot() returned 'mark'.
+        """
+        while len(self.journal) > mark:
+            self.unmake()
+
+    def begin(self):
+        """
+        Before the actual game, we need to empty the occupied set,
+        because from this point, it will be used to store the cells
+        where the player made their shots.
+        """
+        self.occupied = set()
+        self.journal = []
+        self.zobrist = 0
+
+    @property
+    def game_over(self) -> bool:
+        """
+        Defeat if all ships got sunk.
+        """
+        return self.sunk_ships == len(self.ships)
@@ -0,0 +1,96 @@
+"""
+The events a game reports and the sinks that receive them.
+"""
+import sys
+from collections import namedtuple
+
+
+ShotFired = namedtuple("ShotFired", "board cell")
+Hit = namedtuple("Hit", "board cell ship")
+Sunk = namedtuple("Sunk", "board cell ship")
+Miss = namedtuple("Miss", "board cell")
+InvalidShot = namedtuple("InvalidShot", "board cell error")
+GameOver = namedtuple("GameOver", "winner moves")
+"""
+The events emitted by the boards and the games. 'board' is the board that was shot at,
+'cell' the target Dot, 'error' the BoardException of a shot that was refused, and
+'winner' the index of the player who won (0 is the one who started the Game).
+"""
+
+
+class NullSink:
+    """
+    Drops every event: for headless runs.
+    """
+
+    def emit(self, event):
+        pass
+
+    def flush(self):
+        pass
+
+
+NULL_SINK = NullSink()
+
+
+class ListSink:
+    """
+    Keeps every event in a list, for tools that read the events afterwards.
+    """
+
+    def __init__(self):
+        self.events = []
+
+    def emit(self, event):
+        self.events.append(event)
+
+    def flush(self):
+        pass
+
+
+class BufferedConsoleSink:
+    """
+    Writes the events the player needs to see as console messages, in batches:
+    the lines are kept until flush() or until 'capacity' lines are waiting.
+    """
+    MESSAGES = {Hit: "Hit!", Sunk: "The ship is sunk!", Miss: "Miss!"}
+
+    def __init__(self, out=None, capacity=64):
+        self.out = out
+        self.capacity = capacity
+        self.lines = []
+
+    def emit(self, event):
+        kind = type(event)
+        if kind is InvalidShot:
+            self.lines.append(str(event.error))
+        elif kind in self.MESSAGES:
+            self.lines.append(self.MESSAGES[kind])
+        else:
+            return
+        if len(self.lines) >= self.capacity:
+            self.flush()
+
+    def flush(self):
+        if self.lines:
+            out = self.out or sys.stdout
+            out.write("\n".join(self.lines) + "\n")
+            out.flush()
+            self.lines = []
+
+
+class TeeSink:
+    """
+    Passes every event on to several sinks.
+    """
+
+    def __init__(self, *sinks):
+        self.sinks = sinks
+
+    def emit(self, event):
+        for sink in self.sinks:
+            sink.emit(event)
+
+    def flush(self):
+        for sink in self.sinks:
+            sink.flush()
@@ -0,0 +1,365 @@
+"""
+The console game and headless AI vs AI simulations.
+"""
+import random
+import sys
+import time
+from collections import namedtuple
+
+from . import metrics
+from .core import Board, BoardWrongShipException, Dot, Ship
+from .events import NULL_SINK, BufferedConsoleSink, GameOver, TeeSink
+from .placement import placement_table
+from .players import AI, Human
+from .render import AnsiBoardView
+from .rng import game_rng
+from .solver import FleetSolver
+
+
+class Game:
+    board_class = Board  # the board engine used by gen_ships (Board or BitBoard)
+    uniform = False  # whether forced_gen_ships draws the layouts uniformly (FleetSolver.sample)
+
+    def __init__(self, size=Board.MAX_COORD, pool=None, events=None, recorder=None, rng=random):
+        self.size = size
+        self.pool = pool  # an optional BoardPool with ready-made boards
+        self.recorder = recorder  # an optional ReplayRecorder
+        self.rng = rng  # the random stream of the fleets and of the AI, the random module by default
+        self.events = events or BufferedConsoleSink()
+        human = self.new_board()
+        computer = self.new_board()
+        computer.hidden = True  # Whether we want to hide AI's board to the Human
+        human.events = computer.events = self.events if recorder is None else TeeSink(self.events, recorder)
+
+        self.ai = AI(computer, human, rng)
+        self.human = Human(human, computer)
+
+    @classmethod
+    def generator(cls, size=Board.MAX_COORD, board_class=Board, rng=random) -> "Game":
+        """
+        A Game that is only used to generate boards: no boards or players are created.
+        """
+        game = cls.__new__(cls)
+        game.size = size
+        game.rng = rng
+        game.pool = None
+        game.board_class = board_class
+        game.events = NULL_SINK
+        game.recorder = None
+        return game
+
+    def new_board(self) -> Board:
+        """
+        A board with a random fleet, taken from the pool when there is one.
+        """
+        with metrics.METRICS.phase("new_board"):
+            if self.pool is not None:
+                return self.pool.take(self.size)  # any board: the pool draws the fleets itself
+            return self.forced_gen_ships()
+
+    def forced_gen_ships(self, lengths=None) -> Board:
+        """
+        Generates a random board with the given fleet (a random fleet by default).
+        Random placement is tried first; if it fails, the fleet solver lays the fleet out.
+        A fleet that can't fit on the board raises ValueError.
+
+        gen_ships favours the layouts in which the first ships leave the most room to the
+        others. With 'uniform' set, the layouts come from sample_ships instead.
+        """
+        if self.uniform:
+            return self.sample_ships(lengths)
+        if lengths is None:
+            lengths = self.gen_fleet()
+        board = self.gen_ships(lengths)
+        if board is None:
+            metrics.METRICS.count("forced_gen_ships.solver")
+            solver = FleetSolver(self.size, lengths)
+            layout = solver.solve(shuffle=self.rng.shuffle)
+            if layout is None:
+                raise ValueError(f"The fleet {solver.fleet} doesn't fit on a {self.size}x{self.size} board")
+            board = solver.board(layout, self.board_class)
+        return board
+
+    def sample_ships(self, lengths=None) -> Board:
+        """
+        Generates a board whose layout is drawn uniformly among all the valid layouts of the
+        given fleet (a random fleet by default). A fleet that doesn't fit, or that is too dense
+        for FleetSolver.sample to draw from, raises ValueError; a random fleet of that kind is
+        drawn again instead (the "sample_ships.redraws" metric counts these), so on boards
+        over 7x7 the densest fleets of gen_fleet don't come up in this mode.
+        """
+        while True:
+            fleet = self.gen_fleet() if lengths is None else lengths
+            solver = FleetSolver(self.size, fleet)
+            layout = solver.sample(self.rng)
+            if layout is not None:
+                return solver.board(layout, self.board_class)
+            if lengths is not None:
+                reason = "is too dense to draw uniformly" if solver.exhausted else "doesn't fit"
+                raise ValueError(f"The fleet {solver.fleet} {reason} on a {self.size}x{self.size} board")
+            metrics.METRICS.count("sample_ships.redraws")
+
+    def gen_fleet(self) -> list:
+        """
+        The number and length of ships is determined by the board dimensions
+        and are randomized: fewer ships that are bigger & more smaller ships.
+        A bigger board gets the fleets of as many 10x10 boards as its area holds, drawn
+        one by one, so the density of its fleet stays close to the 10x10 average.
+        Fleets that can't fit on the board are drawn again; raises ValueError if even the
+        smallest fleet of the draw doesn't fit, as on boards under 5x5.
+        """
+        k = range(max(1, self.size * self.size // 100))  # the 10x10 boards that fit in this one
+        smallest = [3] * len(k) + [2] * 2 * len(k) + [1] * 3 * len(k)
+        if not FleetSolver(self.size, smallest).feasible():
+            raise ValueError(f"No fleet fits on a {self.size}x{self.size} board")
+        randint = self.rng.randint
+        draws = 0
+        while True:
+            draws += 1
+            lengths = list([4]*sum(randint(0, Board.MAX_COORD // 4) for _ in k) \
+                        + [3]*sum(randint(1, Board.MAX_COORD // 3) for _ in k) \
+                            + [2]*sum(randint(2, Board.MAX_COORD // 2) for _ in k) \
+                                + [1]*sum(randint(3, Board.MAX_COORD // 2 + 1) for _ in k))
+            if FleetSolver.fits(self.size, lengths):
+                metrics.METRICS.observe("gen_fleet.draws", draws)
+                return lengths
+
+    def max_fleet(self) -> int:
+        """
+        The most ships gen_fleet can draw for the board.
+        """
+        k = max(1, self.size * self.size // 100)
+        return k * (Board.MAX_COORD // 4 + Board.MAX_COORD // 3 + Board.MAX_COORD // 2 + Board.MAX_COORD // 2 + 1)
+
+    def gen_ships(self, lengths=None) -> Board:
+        """
+        Places the ships of the given lengths (a random fleet by default) at random.
+        Returns None if the placement didn't succeed in 1000 attempts (50 per ship for big fleets).
+        """
+        if lengths is None:
+            lengths = self.gen_fleet()
+        board = self.board_class(size=self.size)
+        limit = max(1000, 50 * len(lengths))
+        randrange = self.rng.randrange
+        attempts = 0
+        for counter in lengths:
+            """
+            counter defines the length and hp of each ship as given in the lengths list above.
+            """
+            table = placement_table(self.size, counter)
+            while True:
+                attempts += 1
+                if attempts > limit:
+                    metrics.METRICS.count("gen_ships.failures")
+                    return None
+                x, y, orientation = table.bow(randrange(len(table)))  # always on the board
+                ship = Ship(counter, Dot(x, y), orientation)
+                try:
+                    board.place_ship(ship)
+                    """
+                    if the ship's placement succeeded, leave the while loop
+                    and switch to the next ship.
+                    """
+                    break
+                except BoardWrongShipException:
+                    """
+                    in case of failure, keep trying (resume the while loop)
+                    """
+                    pass
+        metrics.METRICS.observe("gen_ships.attempts", attempts)
+        board.begin()
+        return board
+
+    @staticmethod
+    def hello():
+        print("-------------------")
+        print("  Welcome to the   ")
+        print("    BattleShips    ")
+        print("-------------------")
+        print("  When making your ")
+        print(" move, first enter ")
+        print(" row, then column. ")
+        print("-------------------")
+
+    def game_loop(self):
+        move_num = 0
+        shots = 0
+        if self.recorder is not None:
+            self.recorder.begin([self.human.board, self.ai.board], first=0)
+        while True:
+            self.events.flush()  # the messages about the last shot go before the boards
+            print("-" * (Board.MAX_COORD * 3))
+            print("Human Player's board:")
+            print(self.human.board)
+            print("-" * (Board.MAX_COORD * 3))
+            print("AI Player's board:")
+            print(self.ai.board)
+
+            if move_num % 2 == 0:
+                print("-" * (Board.MAX_COORD * 3))
+                print("Your move, Human!")
+                with metrics.METRICS.phase("move.human"):
+                    repeat = self.human.move()
+            else:
+                print("-" * (Board.MAX_COORD * 3))
+                print("AI's move.")
+                with metrics.METRICS.phase("move.ai"):
+                    repeat = self.ai.move()
+            shots += 1
+
+            if repeat:  # when the opponent's ship is hit, another move is granted.
+                move_num -= 1
+
+            if self.ai.board.game_over or self.human.board.game_over:
+                self.events.emit(GameOver(0 if self.ai.board.game_over else 1, shots))
+                self.events.flush()
+                if self.recorder is not None:
+                    self.recorder.end()
+
+            if self.ai.board.game_over:
+                print("-" * (Board.MAX_COORD * 3))
+                print()
+                print("AI's flotilla destroyed! You won, Human!")
+                print(self.ai.board)
+                break
+
+            if self.human.board.game_over:
+                print("-" * (Board.MAX_COORD * 3))
+                print("AI has killed all humans!")
+                print(self.human.board)
+                break
+            move_num += 1
+
+    def start(self):
+        self.hello()
+        self.game_loop()
+
+
+GameResult = namedtuple("GameResult", "winner first moves sink_turns")
+"""
+Outcome of one headless game.
+
+winner / first -- index (0 or 1) of the player who won / who made the first move;
+moves -- total number of shots fired by both players;
+sink_turns -- a pair of lists (one per player's own fleet) of (ship length, move number)
+              in the order the ships were sunk.
+"""
+
+
+class SimulationReport:
+
+    def __init__(self, results, elapsed) -> None:
+        self.results = results
+        self.elapsed = elapsed
+
+    @property
+    def games(self) -> int:
+        return len(self.results)
+
+    @property
+    def games_per_sec(self) -> float:
+        return self.games / self.elapsed if self.elapsed else float("inf")
+
+    def wins(self, player) -> int:
+        return sum(1 for r in self.results if r.winner == player)
+
+    @property
+    def mean_moves(self) -> float:
+        return sum(r.moves for r in self.results) / self.games if self.results else 0.0
+
+    def __str__(self):
+        return (f"{self.games} games in {self.elapsed:.2f}s ({self.games_per_sec:.1f} games/sec)\n"
+                f"Player 0 wins: {self.wins(0)}, Player 1 wins: {self.wins(1)}\n"
+                f"Mean moves per game: {self.mean_moves:.1f}")
+
+
+class Simulation(Game):
+    """
+    Plays complete games between two computer players with no console I/O.
+
+    'players' is a pair of Player subclasses (AI by default) that don't need any input.
+    The first move alternates between the players from one game to the next.
+
+    With a 'seed', game number i draws its fleets and its shots from its own stream,
+    game_rng(seed, i), so any game of a run can be played again on its own, shot for shot
+    (boards taken from a pool are the exception). Without one, the games use the random module.
+    """
+
+    def __init__(self, players=(AI, AI), size=Board.MAX_COORD, board_class=Board, pool=None, events=None,
+                 recorder=None, seed=None, uniform=False):
+        self.size = size
+        self.players = players
+        self.board_class = board_class
+        self.pool = pool
+        self.events = events or NULL_SINK
+        self.recorder = recorder
+        self.seed = seed
+        self.uniform = uniform
+        self.rng = random
+
+    def play_one(self, first=0, on_move=None, index=0) -> GameResult:
+        """
+        Plays game number 'index' of the run; 'on_move' is called with the two boards
+        and the number of moves after every shot.
+        """
+        if self.seed is not None:
+            self.rng = game_rng(self.seed, index)
+        boards = [self.new_board(), self.new_board()]
+        for board in boards:
+            board.events = self.events if self.recorder is None else TeeSink(self.events, self.recorder)
+        if self.recorder is not None:
+            self.recorder.begin(boards, first)
+        players = [cls(boards[i], boards[1 - i], self.rng) for i, cls in enumerate(self.players)]
+
+        sink_turns = ([], [])
+        current = first
+        moves = 0
+        while True:
+            target = players[current].opponent
+            sunk_before = target.sunk_ships
+            with metrics.METRICS.phase("move.ai"):
+                repeat = players[current].move()
+            moves += 1
+            if on_move is not None:
+                on_move(boards, moves)
+
+            if target.sunk_ships != sunk_before:  # a ship was sunk by this shot, the last one in the journal
+                sink_turns[1 - current].append((target.journal[-1][1].length, moves))
+
+            if target.game_over:
+                self.events.emit(GameOver(current, moves))
+                if self.recorder is not None:
+                    self.recorder.end()
+                return GameResult(current, first, moves, sink_turns)
+
+            if not repeat:  # a miss passes the turn to the other player
+                current = 1 - current
+
+    def run(self, games, start=0) -> SimulationReport:
+        """
+        Plays the games number 'start' to 'start + games - 1'.
+        """
+        started = time.perf_counter()
+        results = [self.play_one(first=i % 2, index=i) for i in range(start, start + games)]
+        return SimulationReport(results, time.perf_counter() - started)
+
+    def watch(self, games=1, delay=0.05, start=0):
+        """
+        Plays games on the terminal, redrawing only the cells that change after every shot.
+        """
+        views = []
+
+        def draw(boards, moves):
+            if not views:
+                sys.stdout.write("\033[2J")  # clear the screen once per game
+                views.extend(AnsiBoardView(board, top=2, left=1 + i * (3 * self.size + 4))
+                             for i, board in enumerate(boards))
+            sys.stdout.write(f"\033[1;1HMove {moves}")
+            for view in views:
+                view.draw()
+            time.sleep(delay)
+
+        for i in range(start, start + games):
+            views.clear()
+            result = self.play_one(first=i % 2, on_move=draw, index=i)
+            print(f"Player {result.winner} won in {result.moves} moves")
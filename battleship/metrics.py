@@ -0,0 +1,146 @@
+"""
+Instrumentation: counters, histograms and phase timers, off unless enabled.
+"""
+import time
+from collections import Counter
+
+
+class NullMetrics:
+    """
+    Instrumentation that is switched off: every call does nothing.
+    """
+    enabled = False
+
+    def count(self, name, amount=1):
+        pass
+
+    def observe(self, name, value):
+        pass
+
+    def phase(self, name):
+        return NULL_PHASE
+
+
+class NullPhase:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_PHASE = NullPhase()
+
+
+class Metrics(NullMetrics):
+    """
+    Counters, histograms of integer values (e.g. placement attempts per board)
+    and phase timers (total, calls and longest call of e.g. rendering).
+
+    The instrumented code reports to the module's METRICS, which is a NullMetrics
+    until enable_metrics() is called.
+    """
+    enabled = True
+
+    def __init__(self):
+        self.counters = Counter()
+        self.histograms = {}  # name -> Counter of values
+        self.timers = {}  # name -> [calls, total seconds, longest call]
+
+    def count(self, name, amount=1):
+        self.counters[name] += amount
+
+    def observe(self, name, value):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Counter()
+        histogram[value] += 1
+
+    def phase(self, name) -> "Phase":
+        return Phase(self, name)
+
+    def snapshot(self) -> dict:
+        """
+        Everything measured so far, as JSON-ready data.
+        """
+        return {
+            "counters": dict(self.counters),
+            "histograms": {name: {str(value): n for value, n in sorted(histogram.items())}
+                           for name, histogram in self.histograms.items()},
+            "timers": {name: {"calls": calls, "total": total, "max": longest}
+                       for name, (calls, total, longest) in self.timers.items()},
+        }
+
+    @staticmethod
+    def quantile(histogram, q):
+        rank = -(-sum(histogram.values()) * q // 100)
+        for value in sorted(histogram):
+            rank -= histogram[value]
+            if rank <= 0:
+                return value
+
+    def summary(self) -> str:
+        lines = []
+        for name, n in sorted(self.counters.items()):
+            lines.append(f"{name}: {n}")
+        for name, histogram in sorted(self.histograms.items()):
+            n = sum(histogram.values())
+            mean = sum(value * k for value, k in histogram.items()) / n
+            lines.append(f"{name}: {n} samples, mean {mean:.2f}, p50 {self.quantile(histogram, 50)}, "
+                         f"p90 {self.quantile(histogram, 90)}, max {max(histogram)}")
+        for name, (calls, total, longest) in sorted(self.timers.items()):
+            lines.append(f"{name}: {total:.3f}s in {calls} calls, mean {total / calls * 1e6:.1f}us, "
+                         f"max {longest * 1e3:.2f}ms")
+        return "\n".join(lines)
+
+
+class Phase:
+    """
+    Times a 'with' block into a Metrics timer.
+    """
+    __slots__ = ("metrics", "name", "started")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.started
+        timer = self.metrics.timers.get(self.name)
+        if timer is None:
+            timer = self.metrics.timers[self.name] = [0, 0.0, 0.0]
+        timer[0] += 1
+        timer[1] += elapsed
+        if elapsed > timer[2]:
+            timer[2] = elapsed
+        return False
+
+
+def percentile(values, q) -> float:
+    """
+    The nearest-rank q-th percentile (0 < q <= 100) of a non-empty sequence.
+    """
+    ordered = sorted(values)
+    return ordered[max(0, -(-len(ordered) * q // 100) - 1)]
+
+
+METRICS = NullMetrics()
+
+
+def enable_metrics() -> Metrics:
+    """
+    Switches the instrumentation on (with fresh measurements) and returns it.
+    """
+    global METRICS
+    METRICS = Metrics()
+    return METRICS
+
+
+def disable_metrics():
+    global METRICS
+    METRICS = NullMetrics()
@@ -0,0 +1,89 @@
+"""
+The computer strategies backed by NumPy.
+"""
+from .bitboard import BitBoard
+from .placement import placement_table
+from .players import HeatmapAI, PlacementDensity
+
+try:
+    import numpy
+except ImportError:  # NumPy is optional, only the vectorized engines need it
+    numpy = None
+
+
+class NumpyPlacementDensity(PlacementDensity):
+    """
+    PlacementDensity on NumPy arrays: the cells of every placement are a row of an index
+    matrix, padded with a spare cell at the end of 'density' that is never read, and every
+    cell has the array of the placements that cross it. Blocking a cell only touches those
+    placements, sinking a ship only the placements of its length, and the whole board is
+    only scanned to pick a cell, in one argmax.
+    """
+
+    def __init__(self, size, fleet):
+        if numpy is None:
+            raise RuntimeError("NumpyPlacementDensity needs NumPy installed")
+        self.size = size
+        cells = size * size
+        self.afloat = numpy.zeros(max(fleet) + 1, dtype=numpy.int64)
+        for length in fleet:
+            self.afloat[length] += 1
+
+        rows, lengths = [], []
+        self.by_length = {}  # ship length -> the slice of its placements
+        for length in sorted(set(fleet)):
+            start = len(rows)
+            for _, _, _, body, _ in placement_table(size, length):
+                rows.append(list(BitBoard.bits(body)))
+                lengths.append(length)
+            self.by_length[length] = slice(start, len(rows))
+        self.cells = numpy.full((len(rows), max(fleet)), cells, dtype=numpy.int32)  # padded with the spare cell
+        for p, row in enumerate(rows):
+            self.cells[p, :len(row)] = row
+        self.lengths = numpy.array(lengths)
+        self.alive = numpy.ones(len(lengths), dtype=bool)
+
+        flat = self.cells.ravel()
+        order = numpy.argsort(flat, kind="stable")
+        bounds = numpy.searchsorted(flat[order], numpy.arange(cells + 1))
+        owners = order // self.cells.shape[1]
+        self.covering = [owners[bounds[c]:bounds[c + 1]] for c in range(cells)]  # cell -> placement numbers
+        self.density = numpy.bincount(flat, weights=numpy.repeat(self.afloat[self.lengths], self.cells.shape[1]),
+                                      minlength=cells + 1).astype(numpy.int64)
+
+    def block(self, c):
+        placements = self.covering[c]
+        placements = placements[self.alive[placements]]
+        if placements.size:
+            self.alive[placements] = False
+            numpy.subtract.at(self.density, self.cells[placements], self.afloat[self.lengths[placements], None])
+
+    def sink(self, length):
+        self.afloat[length] -= 1
+        span = self.by_length[length]
+        self.density -= numpy.bincount(self.cells[span][self.alive[span]].ravel(), minlength=len(self.density))
+
+    def hunt(self, shot) -> int:
+        density = numpy.where(numpy.frombuffer(shot, dtype=numpy.uint8) == 0, self.density[:-1], -1)
+        return int(density.argmax())
+
+    def target(self, hits, shot) -> int:
+        hit_cells = numpy.fromiter(hits, dtype=numpy.int32, count=len(hits))
+        placements = numpy.unique(numpy.concatenate([self.covering[h] for h in hits]))
+        placements = placements[self.alive[placements]]
+        cells = self.cells[placements]
+        covered = numpy.isin(cells, hit_cells).sum(axis=1)
+        weights = self.afloat[self.lengths[placements]] * covered * covered
+        scores = numpy.bincount(cells.ravel(), weights=numpy.repeat(weights, cells.shape[1]),
+                                minlength=len(self.density))[:-1]
+        scores[numpy.frombuffer(shot, dtype=numpy.uint8) == 1] = 0
+        best = int(scores.argmax())
+        return best if scores[best] > 0 else -1
+
+
+class NumpyHeatmapAI(HeatmapAI):
+    """
+    HeatmapAI on NumpyPlacementDensity: faster than HeatmapAI from about 30 x 30 up,
+    slower on the small boards where every shot costs a few NumPy calls for a handful of cells.
+    """
+    density_class = NumpyPlacementDensity
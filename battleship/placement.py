@@ -0,0 +1,91 @@
+"""
+Every placement of a ship of a given length on a board of a given size.
+"""
+
+
+class PlacementTable:
+    """
+    Every legal in-bounds placement of a ship of one length on a board of one size,
+    as (x, y, orientation, body mask, stroked mask) where the stroked mask is the body
+    plus its single-cell stroke (bit x * size + y stands for the cell (x, y)).
+
+    Placements are numbered: first all orientation 0 bows row by row, then all orientation 1
+    bows; a one-cell ship only has orientation 0. The tables of boards up to CACHE_SIZE keep
+    every entry in memory. Bigger boards would need gigabytes for the masks, so their tables
+    store nothing: the bows follow from the placement numbers and the masks are built on access.
+
+    Ship placement (Game.gen_ships, FleetSolver, BatchEngine), BitBoard and the placement
+    counts of the AIs read the tables; the renderer draws the cells of the board and doesn't.
+    """
+    CACHE_SIZE = 64  # the biggest board whose tables keep their entries
+
+    def __init__(self, size, length):
+        self.size = size
+        self.length = length
+        self.rows = size - length + 1  # bow positions along the ship
+        self.count = max(self.rows, 0) * size * (1 if length == 1 else 2)
+        self.entries = None
+        if size <= PlacementTable.CACHE_SIZE:
+            self.entries = [self.build(i) for i in range(self.count)]
+
+    def bow(self, i) -> tuple:
+        """
+        The (x, y, orientation) of placement number i.
+        """
+        if i < self.rows * self.size:
+            return i // self.size, i % self.size, 0
+        i -= self.rows * self.size
+        return i // self.rows, i % self.rows, 1
+
+    def find(self, x, y, orientation) -> int:
+        """
+        The number of the placement with this bow and orientation, or -1 if it's off the board.
+        """
+        if self.length == 1:
+            orientation = 0
+        if orientation == 0 and 0 <= x < self.rows and 0 <= y < self.size:
+            return x * self.size + y
+        if orientation == 1 and 0 <= x < self.size and 0 <= y < self.rows:
+            return self.rows * self.size + x * self.rows + y
+        return -1
+
+    def build(self, i) -> tuple:
+        x, y, orientation = self.bow(i)
+        size = self.size
+        dx, dy = (1, 0) if orientation == 0 else (0, 1)
+        body = stroked = 0
+        for k in range(self.length):
+            cx, cy = x + dx * k, y + dy * k
+            body |= 1 << (cx * size + cy)
+            for nx in range(max(cx - 1, 0), min(cx + 2, size)):
+                for ny in range(max(cy - 1, 0), min(cy + 2, size)):
+                    stroked |= 1 << (nx * size + ny)
+        return x, y, orientation, body, stroked
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i) -> tuple:
+        if self.entries is not None:
+            return self.entries[i]
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        return self.build(i)
+
+    def __iter__(self):
+        if self.entries is not None:
+            return iter(self.entries)
+        return (self.build(i) for i in range(self.count))
+
+
+PLACEMENT_TABLES = {}  # (board size, ship length) -> PlacementTable
+
+
+def placement_table(size, length) -> PlacementTable:
+    """
+    The placement table of a ship length on a board size, built on first use.
+    """
+    table = PLACEMENT_TABLES.get((size, length))
+    if table is None:
+        table = PLACEMENT_TABLES[(size, length)] = PlacementTable(size, length)
+    return table
@@ -0,0 +1,505 @@
+"""
+The human player and the computer strategies.
+"""
+import atexit
+import os
+import random
+import time
+from collections import Counter
+
+from . import metrics
+from .bitboard import BitBoard
+from .core import Dot, ShotOutcome
+from .placement import placement_table
+from .zobrist import TranspositionTable
+
+
+class Player:
+    expensive = False  # whether a move takes long enough to be worth a worker thread
+
+    def __init__(self, board, opponent, rng=random):
+        self.board = board
+        self.opponent = opponent
+        self.rng = rng  # where the computer players draw their random choices from
+
+    def ask(self):
+        raise NotImplementedError()
+
+    def move(self):
+        retries = 0
+        while True:
+            target = self.ask()  # asks Player for input of coords to shoot
+            outcome = self.opponent.fire(target)  # the board reports the refused shots itself
+            if outcome.valid:
+                metrics.METRICS.observe("move.retries", retries)
+                return outcome.hit  # if hit/sunk, grants another move
+            retries += 1
+
+
+class TargetPool:
+    """
+    The cells of a board that can still be shot at, by number (x * size + y), in a list
+    next to the position of every cell in it: drawing a random cell is an index and
+    removing a cell moves the last one into its place, both O(1).
+
+    The pool watches the board: its shots and the strokes around its sunk ships leave
+    the pool as soon as the board marks them, and unmake() puts them back.
+    """
+
+    def __init__(self, board):
+        self.cells = board.open_cells()
+        self.position = [-1] * (board.size * board.size)  # cell number -> index in cells, -1 if not there
+        for i, c in enumerate(self.cells):
+            self.position[c] = i
+        board.watchers.append(self)
+
+    def __len__(self):
+        return len(self.cells)
+
+    def draw(self, rng=random) -> int:
+        return self.cells[rng.randrange(len(self.cells))]
+
+    def rule_out(self, numbers):
+        cells, position = self.cells, self.position
+        for c in numbers:
+            i = position[c]
+            if i == -1:
+                continue
+            last = cells.pop()
+            if last != c:
+                cells[i] = last
+                position[last] = i
+            position[c] = -1
+
+    def rule_in(self, numbers):
+        cells, position = self.cells, self.position
+        for c in numbers:
+            if position[c] == -1:
+                position[c] = len(cells)
+                cells.append(c)
+
+
+class AI(Player):
+    targets = None  # the TargetPool of the opponent's board, made on the first move
+    book = None  # an OpeningBook for the first shots, shared by all the computer players
+
+    def opening(self) -> int:
+        """
+        The opening book's shot for what is known of the opponent's board, or -1.
+        """
+        if self.book is None:
+            return -1
+        return self.book.lookup(self.opponent.size, self.opponent.zobrist)
+
+    def ask(self) -> Dot:
+        c = self.opening()
+        if c != -1:
+            return Dot(c // self.opponent.size, c % self.opponent.size)
+        if self.targets is None:
+            self.targets = TargetPool(self.opponent)
+        if not self.targets:  # nothing left to shoot at: the game is over anyway
+            return Dot(self.rng.randrange(self.opponent.size), self.rng.randrange(self.opponent.size))
+        c = self.targets.draw(self.rng)
+        return Dot(c // self.opponent.size, c % self.opponent.size)  # returns coords of the attempted shot
+
+
+class Human(Player):
+
+    def ask(self) -> Dot:
+        """
+        The human player makes their move.
+        """
+        while True:
+            self.opponent.events.flush()  # e.g. why the previous attempt was refused
+            move = input("Coordinates to shoot? ").split()
+
+            if len(move) != 2:
+                print(" Enter both coordinates! ")
+                continue
+
+            x, y = move
+
+            if (not x.isdecimal()) or (not y.isdecimal()):
+                print(" Coordinates must be numbers! ")
+                continue
+
+            x, y = int(x), int(y)
+
+            return Dot(x, y)  # returns coords of the attempted shot
+
+
+class PlacementDensity:
+    """
+    For every cell of the opponent's board (cell number x * size + y), the number of
+    placements of the ships still afloat that don't cross any cell known to be empty.
+    A placement counts once per ship of its length still afloat.
+
+    The counts are kept up to date incrementally: blocking a cell only touches the
+    placements that cross it, and sinking a ship only touches the placements of its length.
+    """
+
+    def __init__(self, size, fleet):
+        self.size = size
+        self.afloat = Counter(fleet)  # ships afloat per length
+        self.lengths = []  # placement number -> ship length
+        self.cells = []  # placement number -> cell numbers
+        self.alive = []  # placement number -> doesn't cross a known empty cell
+        self.by_length = {}  # ship length -> placement numbers
+        self.covering = [[] for _ in range(size * size)]  # cell number -> placement numbers
+        self.density = [0] * (size * size)
+
+        for length, count in self.afloat.items():
+            numbers = self.by_length[length] = []
+            for _, _, _, body, _ in placement_table(size, length):
+                p = len(self.lengths)
+                cells = list(BitBoard.bits(body))
+                numbers.append(p)
+                self.lengths.append(length)
+                self.cells.append(cells)
+                self.alive.append(True)
+                for c in cells:
+                    self.covering[c].append(p)
+                    self.density[c] += count
+
+    def block(self, c):
+        """
+        Cell c holds no ship afloat (a miss, a stroke or a sunk ship).
+        """
+        density, afloat = self.density, self.afloat
+        for p in self.covering[c]:
+            if self.alive[p]:
+                self.alive[p] = False
+                weight = afloat[self.lengths[p]]
+                if weight:
+                    for q in self.cells[p]:
+                        density[q] -= weight
+
+    def sink(self, length):
+        """
+        A ship of this length was sunk: its placements count one time less.
+        """
+        self.afloat[length] -= 1
+        density = self.density
+        for p in self.by_length[length]:
+            if self.alive[p]:
+                for q in self.cells[p]:
+                    density[q] -= 1
+
+    def hunt(self, shot) -> int:
+        """
+        The unshot cell with the highest density.
+        """
+        best, best_density = -1, -1
+        for c, value in enumerate(self.density):
+            if value > best_density and not shot[c]:
+                best, best_density = c, value
+        return best
+
+    def target(self, hits, shot) -> int:
+        """
+        The unshot cell crossed by the most placements that go through the wounded ship(s),
+        placements through several hits counting more, the lowest cell number of the best
+        ones like in hunt(). Returns -1 if there is none.
+        """
+        scores = {}
+        seen = set()
+        for h in hits:
+            for p in self.covering[h]:
+                if p in seen or not self.alive[p] or not self.afloat[self.lengths[p]]:
+                    continue
+                seen.add(p)
+                covered = sum(1 for q in self.cells[p] if q in hits)
+                weight = self.afloat[self.lengths[p]] * covered * covered
+                for q in self.cells[p]:
+                    if not shot[q]:
+                        scores[q] = scores.get(q, 0) + weight
+        return min(scores, key=lambda q: (-scores[q], q)) if scores else -1
+
+
+class HeatmapAI(AI):
+    """
+    Shoots at the cell where the opponent's remaining ships fit in the most ways.
+
+    While no ship is wounded ('hunt' mode) that's the cell with the highest placement
+    density; after a hit ('target' mode) only the placements through the wounded ship
+    count. Knows the opponent's fleet, like a player is told the fleet before the game,
+    and never shoots at a cell that is already shot or stroked.
+    """
+    density_class = PlacementDensity
+
+    def __init__(self, board, opponent, rng=random):
+        super().__init__(board, opponent, rng)
+        self.size = opponent.size
+        self.density = self.density_class(self.size, [ship.length for ship in opponent.ships])
+        self.shot = bytearray(self.size * self.size)  # cells that are shot or known to be empty
+        self.hits = set()  # hit cells of ships not sunk yet
+        self.afloat = [ship.length for ship in opponent.ships]
+        self.blocked = 0  # cells that hold no ship afloat, as a mask
+        self.hit_mask = 0  # hits on ships afloat, as a mask
+
+    def ask(self) -> Dot:
+        c = self.opening()
+        if c == -1 and self.hits:
+            c = self.density.target(self.hits, self.shot)
+        if c == -1:
+            c = self.density.hunt(self.shot)
+        return Dot(c // self.size, c % self.size)
+
+    def move(self):
+        target = self.ask()
+        outcome = self.opponent.fire(target)
+        self.observe(target, outcome.hit, outcome is ShotOutcome.SUNK)
+        return outcome.hit
+
+    def observe(self, cell, hit, sunk):
+        c = cell.x * self.size + cell.y
+        self.shot[c] = 1
+        if not hit:
+            self.density.block(c)
+            self.blocked |= 1 << c
+            return
+        self.hits.add(c)
+        self.hit_mask |= 1 << c
+        if sunk:
+            ship = self.opponent.owners[cell.x][cell.y]
+            table = placement_table(self.size, ship.length)
+            stroked = table[table.find(ship.bow.x, ship.bow.y, ship.orientation)][4]
+            self.density.sink(ship.length)
+            self.afloat.remove(ship.length)
+            self.blocked |= stroked
+            self.hit_mask &= ~stroked
+            for q in BitBoard.bits(stroked):  # the ship and its stroke hold no other ship
+                self.hits.discard(q)
+                self.shot[q] = 1
+                self.density.block(q)
+
+
+class EndgameAI(HeatmapAI):
+    """
+    Plays the end of the game exactly: once no more than 'endgame_ships' ships are
+    afloat, counts every layout of them that agrees with the shots so far and shoots at
+    the cell that holds a ship in the most layouts, the highest hit probability there is.
+
+    The count is a depth-first search over the placements of the ships afloat, as
+    bitmasks, with the number of ways to finish from every (ships placed, cells taken)
+    state memoized for the search. A search that takes more than 'time_budget' seconds
+    is dropped for HeatmapAI's choice.
+
+    What a search finds depends only on what is known of the opponent's board, its
+    Zobrist hash, and on the ships afloat, so the answers are kept in 'table', shared by
+    all the endgame players of the process: a state of knowledge reached again, in this
+    game or another, by the same shots in any order, is answered without a search.
+    """
+    endgame_ships = 3
+    time_budget = 0.05
+    table = TranspositionTable(1 << 12)  # (size, opponent's zobrist, ships afloat) -> endgame()
+
+    def ask(self) -> Dot:
+        if len(self.afloat) <= self.endgame_ships:
+            c = self.endgame()
+            if c != -1:
+                return Dot(c // self.size, c % self.size)
+            metrics.METRICS.count("endgame.fallbacks")
+        return super().ask()
+
+    def endgame(self) -> int:
+        """
+        The unshot cell number that holds a ship in the most consistent layouts,
+        or -1 if they couldn't be counted within the time budget.
+        """
+        key = (self.size, self.opponent.zobrist, tuple(sorted(self.afloat)))
+        best = EndgameAI.table.get(key)
+        if best is not None:
+            return best
+        deadline = time.perf_counter() + self.time_budget
+        blocked, hits = self.blocked, self.hit_mask
+        fleet = sorted(self.afloat, reverse=True)  # the longest ships have the fewest placements
+        room = [sum(fleet[depth:]) for depth in range(len(fleet) + 1)]  # ship cells left to place
+        candidates = {}  # length -> (body, body and stroke) clear of blocked cells, touching no hit they don't cover
+        for length in set(fleet):
+            candidates[length] = [(body, stroked) for _, _, _, body, stroked in placement_table(self.size, length)
+                                  if not body & blocked and not stroked & ~body & hits]
+        memo = {}  # (depth, used) -> completions()
+        nodes = [0]
+
+        def out_of_time() -> bool:
+            nodes[0] += 1
+            return nodes[0] & 255 == 0 and time.perf_counter() > deadline
+
+        def completions(depth, used):
+            """
+            The number of ways to place the ships from number 'depth' on, given the
+            cells 'used' by the ships before them and their strokes; None when out of time.
+            """
+            if depth == len(fleet):
+                return 1 if used & hits == hits else 0
+            if bin(hits & ~used).count("1") > room[depth]:  # hits left that no ship can cover
+                return 0
+            count = memo.get((depth, used))
+            if count is None:
+                if out_of_time():
+                    return None
+                count = 0
+                for body, stroked in candidates[fleet[depth]]:
+                    if not body & used:
+                        rest = completions(depth + 1, used | stroked)
+                        if rest is None:
+                            return None
+                        count += rest
+                memo[(depth, used)] = count
+            return count
+
+        # weight every placement by the ways to reach its state times the ways to finish from it
+        weights = [0] * (self.size * self.size)
+        layer = {0: 1}  # cells used -> ways to place the ships so far
+        for depth, length in enumerate(fleet):
+            following = {}
+            for used, ways in layer.items():
+                for body, stroked in candidates[length]:
+                    if body & used:
+                        continue
+                    rest = completions(depth + 1, used | stroked)
+                    if rest is None or out_of_time():
+                        return -1
+                    if rest:
+                        for c in BitBoard.bits(body):
+                            weights[c] += ways * rest
+                        following[used | stroked] = following.get(used | stroked, 0) + ways
+            layer = following
+
+        best, best_weight = -1, 0
+        for c, weight in enumerate(weights):
+            if weight > best_weight and not self.shot[c]:
+                best, best_weight = c, weight
+        EndgameAI.table.put(key, best)
+        return best
+
+
+def sample_layouts(size, fleet, blocked, hits, count, seed) -> list:
+    """
+    Draws up to 'count' fleet layouts consistent with what is known about a board:
+    no ship on a 'blocked' cell (misses, strokes, sunk ships), every cell of 'hits' covered
+    by a ship and no ship touching a hit it doesn't cover. Returns the layouts as masks of
+    the ship cells. Runs in the worker processes of MonteCarloAI, hence the plain arguments.
+
+    The wounded ships are placed first, through a hit chosen uniformly among the placements
+    that cover it, then the other ships anywhere they fit.
+    """
+    rng = random.Random(seed)
+    candidates = {}  # length -> (body, stroke) of the placements clear of blocked cells and hits
+    for length in set(fleet):
+        candidates[length] = [(body, stroked & ~body) for _, _, _, body, stroked in placement_table(size, length)
+                              if not body & blocked and not stroked & ~body & hits]
+
+    layouts = []
+    for _ in range(count * 20):  # give up on observations that are (nearly) impossible to satisfy
+        if len(layouts) == count:
+            break
+        remaining = list(fleet)
+        used = cells = 0
+        while hits & ~cells:  # place a ship through the lowest uncovered hit
+            hit = hits & ~cells & -(hits & ~cells)
+            options = [(length, body, stroke) for length in set(remaining) for body, stroke in candidates[length]
+                       if body & hit and not body & used]
+            if not options:
+                break
+            length, body, stroke = rng.choice(options)
+            remaining.remove(length)
+            used |= body | stroke
+            cells |= body
+        else:
+            for length in remaining:
+                fits = candidates[length]
+                for _ in range(16):  # a few blind tries before filtering the whole list
+                    body, stroke = rng.choice(fits)
+                    if not body & used:
+                        break
+                else:
+                    fits = [(body, stroke) for body, stroke in fits if not body & used]
+                    if not fits:
+                        break
+                    body, stroke = rng.choice(fits)
+                used |= body | stroke
+                cells |= body
+            else:
+                layouts.append(cells)
+    return layouts
+
+
+class MonteCarloAI(HeatmapAI):
+    """
+    Shoots at the cell that holds a ship in most of the sampled opponent layouts
+    consistent with the hits, misses and sunk ships seen so far.
+
+    Sampling is spread across a process pool shared by all MonteCarloAI players.
+    'samples' is the sample budget per move and 'workers' the number of processes
+    (1 samples in this process). The samples survive from one move to the next:
+    a hit or a miss only keeps the samples that agree with it, and new samples are
+    only drawn when fewer than 'reuse' * samples remain. A sunk ship starts over.
+    When no layout can be sampled the AI falls back to HeatmapAI's choice.
+    """
+    expensive = True
+    samples = 1000
+    workers = os.cpu_count() or 1
+    reuse = 0.5
+    parallel_threshold = 200  # smaller batches are sampled in this process
+    executor = None
+
+    def __init__(self, board, opponent, rng=random):
+        super().__init__(board, opponent, rng)
+        self.layouts = []
+
+    @classmethod
+    def pool(cls) -> "ProcessPoolExecutor":
+        if MonteCarloAI.executor is None:
+            from concurrent.futures import ProcessPoolExecutor  # only when sampling in parallel
+            MonteCarloAI.executor = ProcessPoolExecutor(max_workers=cls.workers)
+            atexit.register(MonteCarloAI.shutdown)
+        return MonteCarloAI.executor
+
+    @staticmethod
+    def shutdown():
+        if MonteCarloAI.executor is not None:
+            MonteCarloAI.executor.shutdown()
+            MonteCarloAI.executor = None
+
+    def draw(self, count) -> list:
+        known = (self.size, tuple(self.afloat), self.blocked, self.hit_mask)
+        if self.workers <= 1 or count < self.parallel_threshold:
+            return sample_layouts(*known, count, self.rng.getrandbits(32))
+        chunk = -(-count // self.workers)
+        futures = [self.pool().submit(sample_layouts, *known, chunk, self.rng.getrandbits(32))
+                   for _ in range(self.workers)]
+        return [layout for future in futures for layout in future.result()]
+
+    def ask(self) -> Dot:
+        c = self.opening()
+        if c != -1:
+            return Dot(c // self.size, c % self.size)
+        if len(self.layouts) < self.reuse * self.samples:
+            self.layouts.extend(self.draw(self.samples - len(self.layouts)))
+        if not self.layouts:
+            return super().ask()
+
+        counts = [0] * (self.size * self.size)
+        unknown = ~(self.blocked | self.hit_mask)
+        for layout in self.layouts:
+            for c in BitBoard.bits(layout & unknown):
+                counts[c] += 1
+        best, best_count = -1, 0
+        for c, count in enumerate(counts):
+            if count > best_count and not self.shot[c]:
+                best, best_count = c, count
+        if best == -1:
+            return super().ask()
+        return Dot(best // self.size, best % self.size)
+
+    def observe(self, cell, hit, sunk):
+        super().observe(cell, hit, sunk)
+        bit = 1 << (cell.x * self.size + cell.y)
+        if sunk:
+            self.layouts = []
+        elif hit:
+            self.layouts = [layout for layout in self.layouts if layout & bit]
+        else:
+            self.layouts = [layout for layout in self.layouts if not layout & bit]
@@ -0,0 +1,120 @@
+"""
+Boards generated ahead of time by a background thread.
+"""
+import threading
+from collections import OrderedDict, deque
+
+from .core import Board
+from .game import Game
+
+
+class BoardPool:
+    """
+    A stock of ready-made boards, kept filled by a background thread.
+
+    Boards are grouped by (board size, fleet), the fleet being the sorted ship lengths,
+    or None for the boards with a random fleet drawn like Game.gen_fleet does: a game
+    that doesn't care which fleet it gets takes any of those, so one group serves it.
+    Every group holds up to 'capacity' boards; when more than 'max_fleets' groups are
+    in use, the least recently used group is dropped. Taking a board from a stocked
+    group is O(1); on a miss the board is generated in the caller's thread and the
+    group gets registered, so the worker stocks it up for the next time.
+    """
+
+    def __init__(self, capacity=8, max_fleets=32, board_class=Board):
+        self.capacity = capacity
+        self.max_fleets = max_fleets
+        self.board_class = board_class
+        self.boards = OrderedDict()  # (size, fleet) -> deque of boards, least recently used first
+        self.hits = self.misses = 0
+        self._cond = threading.Condition()
+        self._worker = None
+        self._stopped = False
+
+    @staticmethod
+    def key(size, lengths) -> tuple:
+        return size, None if lengths is None else tuple(sorted(lengths, reverse=True))
+
+    def _group(self, key) -> deque:
+        """
+        Returns the boards of a group (registering it if needed) and marks it as recently used.
+        Must be called with the lock held.
+        """
+        boards = self.boards.get(key)
+        if boards is None:
+            boards = self.boards[key] = deque()
+            while len(self.boards) > self.max_fleets:
+                self.boards.popitem(last=False)  # evict the least recently used group
+        else:
+            self.boards.move_to_end(key)
+        return boards
+
+    def warm(self, size, lengths=None):
+        """
+        Asks the worker to stock up boards with the given fleet (a random fleet by default).
+        """
+        with self._cond:
+            self._group(self.key(size, lengths))
+            self._cond.notify()
+
+    def take(self, size, lengths=None) -> Board:
+        """
+        A board with the given fleet, or with a random fleet by default.
+        """
+        key = self.key(size, lengths)
+        with self._cond:
+            boards = self._group(key)
+            board = boards.popleft() if boards else None
+            self._cond.notify()  # the group is below capacity now
+
+        if board is None:
+            self.misses += 1
+            return self.generate(key)
+        self.hits += 1
+        return board
+
+    def generate(self, key) -> Board:
+        size, fleet = key
+        return Game.generator(size, self.board_class).forced_gen_ships(None if fleet is None else list(fleet))
+
+    def _next_key(self):
+        """
+        The most recently used group that is below capacity, or None.
+        Must be called with the lock held.
+        """
+        for key in reversed(self.boards):
+            if len(self.boards[key]) < self.capacity:
+                return key
+        return None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                key = self._next_key()
+                while key is None and not self._stopped:
+                    self._cond.wait()
+                    key = self._next_key()
+                if self._stopped:
+                    return
+
+            board = self.generate(key)  # the slow part runs without the lock
+
+            with self._cond:
+                boards = self.boards.get(key)  # the group may have been evicted meanwhile
+                if boards is not None and len(boards) < self.capacity:
+                    boards.append(board)
+
+    def start(self) -> "BoardPool":
+        if self._worker is None:
+            self._stopped = False
+            self._worker = threading.Thread(target=self._run, name="BoardPool", daemon=True)
+            self._worker.start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
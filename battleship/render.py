@@ -0,0 +1,103 @@
+"""
+Drawing boards as text and on an ANSI terminal.
+"""
+import sys
+
+from . import metrics
+from .core import Board
+
+
+class BoardRenderer:
+    """
+    Renders a board, or the region 'window' of it, for Board.__str__ and keeps the result.
+
+    Every rendered row is cached for both views of the board, the visible one and the
+    hidden one (ships shown as water), and only the rows painted since the previous
+    frame are rendered again. 'window' is (top row, left column, height, width), the
+    whole board by default. Columns are numbered with their last digit.
+    """
+
+    def __init__(self, board, window=None):
+        self.board = board
+        self.window = window or (0, 0, board.size, board.size)
+        height = self.window[2]
+        self.label = len(str(board.size - 1))  # the width of the row numbers
+        self.rows = {False: [""] * height, True: [""] * height}  # hidden -> rendered rows
+        self.versions = {False: [-1] * height, True: [-1] * height}  # hidden -> row versions seen
+        self.frames = {}  # hidden -> the last full frame
+
+    def render_row(self, x, hidden) -> str:
+        _, left, _, width = self.window
+        row = self.board.row_cells(x, left, width)
+        if hidden:  # toggles visibility of the ships on the board to the other player
+            row = [cell.replace("■", Board.ORIGIN_COLOR + "o") for cell in row]
+        return f"{x:>{self.label}}|" + "|".join(row) + "|\n"
+
+    def header(self) -> str:
+        _, left, _, width = self.window
+        return " " * (self.label + 1) + "".join(f"{y % 10} " for y in range(left, left + width)) + "\n"
+
+    def render(self, hidden) -> str:
+        top, _, height, _ = self.window
+        rows, seen, versions = self.rows[hidden], self.versions[hidden], self.board.row_versions
+        changed = False
+        for i in range(height):
+            version = versions[top + i]
+            if seen[i] != version:
+                rows[i] = self.render_row(top + i, hidden)
+                seen[i] = version
+                changed = True
+        if changed or hidden not in self.frames:
+            self.frames[hidden] = self.header() + "".join(rows)
+        return self.frames[hidden]
+
+
+class AnsiBoardView:
+    """
+    Draws a board at a fixed place of an ANSI terminal and, on every later draw,
+    only rewrites the cells that changed, using cursor addressing.
+
+    'top' and 'left' are the 1-based terminal line and column of the board's header;
+    only the board's region 'window' is drawn (the board's own window by default).
+    """
+
+    def __init__(self, board, top=1, left=1, hidden=None, out=None, window=None):
+        self.board = board
+        self.top = top
+        self.left = left
+        self.hidden = board.hidden if hidden is None else hidden
+        self.out = out
+        self.window = window or board.window
+        self.label = len(str(board.size - 1))  # the width of the row numbers
+        self.cells = None  # what is on the screen now, row by row
+        self.versions = [-1] * self.window[2]
+
+    def cell(self, x, y) -> str:
+        value = self.board.grid[x][y]
+        return value.replace("■", Board.ORIGIN_COLOR + "o") if self.hidden else value
+
+    def draw(self):
+        with metrics.METRICS.phase("render"):
+            out = self.out or sys.stdout
+            x0, y0, height, width = self.window
+            if self.cells is None:  # first frame: the whole window
+                out.write(f"\033[{self.top};{self.left}H")
+                for line in BoardRenderer(self.board, self.window).render(self.hidden).splitlines():
+                    out.write(line + f"\033[1B\033[{self.left}G")
+                self.cells = [[self.cell(x0 + i, y0 + j) for j in range(width)] for i in range(height)]
+                self.versions = self.board.row_versions[x0:x0 + height]
+            else:
+                for i in range(height):
+                    version = self.board.row_versions[x0 + i]
+                    if self.versions[i] == version:
+                        continue
+                    self.versions[i] = version
+                    for j in range(width):
+                        value = self.cell(x0 + i, y0 + j)
+                        if value != self.cells[i][j]:
+                            self.cells[i][j] = value
+                            # the i-th row is on line top + 1 + i, the j-th cell at column left + label + 1 + 2 * j
+                            out.write(f"\033[{self.top + 1 + i};{self.left + self.label + 1 + 2 * j}H"
+                                      f"{value}{Board.ORIGIN_COLOR}")
+            out.write(f"\033[{self.top + height + 1};1H")  # park the cursor below the board
+            out.flush()
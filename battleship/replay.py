@@ -0,0 +1,206 @@
+"""
+The binary replay log.
+"""
+import mmap
+import struct
+import sys
+from array import array
+from collections import namedtuple
+
+from .core import Board, Dot
+from .events import Hit, Miss, Sunk
+from .solver import FleetSolver
+
+
+ReplayGame = namedtuple("ReplayGame", "size first fleets shots")
+"""
+A recorded game: the board size, the index of the player who shot first, the fleets of
+both players' boards as lists of (length, x, y, orientation) and the cell numbers
+(x * size + y) of all the accepted shots in order. Who fired a shot follows from the
+rules: a hit keeps the turn, a miss passes it.
+"""
+
+
+class ReplayLog:
+    """
+    The binary replay format: a file header (magic and version), then one record per game,
+    each one prefixed with its length so a reader can skip over it.
+
+    Record: size (u16), first player (u8), the ship counts of both fleets (u16 each), every
+    ship as bow x, bow y (u8, or u16 on boards over 256 cells wide) and length * 2 + orientation
+    (u16), then the number of shots (u32) and the shots, one byte each on boards up to 16x16
+    and two bytes up to 256x256. Everything is little-endian.
+    """
+    MAGIC = b"BSRL"
+    VERSION = 1
+    HEADER = struct.Struct("<4sB")
+    LENGTH = struct.Struct("<I")
+    GAME = struct.Struct("<HBHH")
+    SHOTS = struct.Struct("<I")
+
+    @staticmethod
+    def ship_format(size) -> struct.Struct:
+        return struct.Struct("<BBH" if size <= 256 else "<HHH")
+
+    @staticmethod
+    def shot_typecode(size) -> str:
+        if size * size <= 256:
+            return "B"
+        if size * size <= 65536:
+            return "H"
+        return "L" if array("L").itemsize == 4 else "I"
+
+
+class ReplayWriter(ReplayLog):
+    """
+    Appends games to a replay log file, creating it with its header if needed.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, "ab")
+        if self.file.tell() == 0:
+            self.file.write(self.HEADER.pack(self.MAGIC, self.VERSION))
+        else:
+            with open(path, "rb") as existing:
+                magic, version = self.HEADER.unpack(existing.read(self.HEADER.size).ljust(self.HEADER.size, b"\0"))
+            if magic != self.MAGIC or version != self.VERSION:
+                self.file.close()
+                raise ValueError(f"{path} is not a version {self.VERSION} replay log")
+
+    def write(self, size, first, fleets, shots):
+        ship = self.ship_format(size)
+        parts = [self.GAME.pack(size, first, len(fleets[0]), len(fleets[1]))]
+        for fleet in fleets:
+            for length, x, y, orientation in fleet:
+                parts.append(ship.pack(x, y, length * 2 + orientation))
+        cells = array(self.shot_typecode(size), shots)
+        if sys.byteorder == "big":
+            cells.byteswap()
+        parts.append(self.SHOTS.pack(len(cells)))
+        parts.append(cells.tobytes())
+        payload = b"".join(parts)
+        self.file.write(self.LENGTH.pack(len(payload)) + payload)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ReplayRecorder:
+    """
+    An event sink that records the games played on the boards it listens to.
+
+    begin() is called with the two boards (in player order) before the first shot
+    and end() after the last one; every accepted shot in between is recorded.
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.boards = ()
+        self.shots = []
+
+    def begin(self, boards, first=0):
+        self.boards = boards
+        self.first = first
+        self.fleets = [[(ship.length, ship.bow.x, ship.bow.y, ship.orientation) for ship in board.ships]
+                       for board in boards]
+        self.shots = []
+
+    def emit(self, event):
+        if type(event) in (Hit, Sunk, Miss) and event.board in self.boards:
+            self.shots.append(event.cell.x * event.board.size + event.cell.y)
+
+    def flush(self):
+        pass
+
+    def end(self):
+        self.writer.write(self.boards[0].size, self.first, self.fleets, self.shots)
+        self.boards = ()
+
+
+class ReplayReader(ReplayLog):
+    """
+    Reads a replay log through a memory map and yields its games one at a time,
+    so even a huge log is never loaded as a whole.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.map = None
+        try:
+            header = self.file.read(self.HEADER.size).ljust(self.HEADER.size, b"\0")  # an empty file can't be mapped
+            magic, version = self.HEADER.unpack(header)
+            if magic != self.MAGIC or version != self.VERSION:
+                raise ValueError(f"{path} is not a version {self.VERSION} replay log")
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            self.close()
+            raise
+
+    def offsets(self):
+        """
+        Yields the offset of every record without decoding them.
+        """
+        offset = self.HEADER.size
+        end = len(self.map)
+        while offset + self.LENGTH.size <= end:
+            length, = self.LENGTH.unpack_from(self.map, offset)
+            yield offset + self.LENGTH.size
+            offset += self.LENGTH.size + length
+
+    def game(self, offset) -> ReplayGame:
+        size, first, ships0, ships1 = self.GAME.unpack_from(self.map, offset)
+        offset += self.GAME.size
+        ship = self.ship_format(size)
+        fleets = ([], [])
+        for fleet, count in zip(fleets, (ships0, ships1)):
+            for _ in range(count):
+                x, y, packed = ship.unpack_from(self.map, offset)
+                fleet.append((packed >> 1, x, y, packed & 1))
+                offset += ship.size
+        count, = self.SHOTS.unpack_from(self.map, offset)
+        offset += self.SHOTS.size
+        typecode = self.shot_typecode(size)
+        width = array(typecode).itemsize
+        shots = memoryview(self.map[offset:offset + count * width]).cast(typecode)
+        if sys.byteorder == "big" and width > 1:
+            shots = array(typecode, shots)
+            shots.byteswap()
+        return ReplayGame(size, first, fleets, shots)
+
+    def __iter__(self):
+        return (self.game(offset) for offset in self.offsets())
+
+    def __len__(self):
+        return sum(1 for _ in self.offsets())
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def replay(game, board_class=Board, on_move=None) -> list:
+    """
+    Plays a recorded game again on new boards and returns the boards.
+    'on_move' is called with the boards and the number of moves after every shot.
+    """
+    boards = [FleetSolver(game.size, []).board(fleet, board_class) for fleet in game.fleets]
+    current = game.first
+    for moves, c in enumerate(game.shots, 1):
+        if not boards[1 - current].shot(Dot(c // game.size, c % game.size)):
+            current = 1 - current
+        if on_move is not None:
+            on_move(boards, moves)
+    return boards
@@ -0,0 +1,87 @@
+"""
+Random streams: one reproducible generator per game, drawn from in blocks.
+"""
+import hashlib
+import random
+import sys
+from array import array
+
+
+def stream_seed(master, index) -> int:
+    """
+    The seed of stream number 'index' of the master seed 'master'. The streams of
+    nearby indices (or masters) are unrelated, so game 41 and game 42 share nothing.
+    """
+    return int.from_bytes(hashlib.blake2b(f"{master}/{index}".encode(), digest_size=16).digest(), "little")
+
+
+class BatchedRandom(random.Random):
+    """
+    A random.Random that answers randint(), randrange() and choice(), the calls of the
+    inner loops, from blocks of 'block' 64-bit values made in one call to the Mersenne
+    Twister, with one multiplication instead of the rejection loop of random.Random.
+    The other methods are those of random.Random.
+
+    The draws are a pure function of the seed, like those of random.Random, but not the
+    same draws: a stream must be replayed with the class that made it.
+    """
+
+    def __init__(self, seed=None, block=1024):
+        self.block = block
+        self.values = []  # the rest of the current block, used from the end
+        super().__init__(seed)
+
+    def seed(self, a=None, version=2):
+        super().seed(a, version)
+        self.values = []
+
+    def getstate(self):
+        return super().getstate(), tuple(self.values)
+
+    def setstate(self, state):
+        state, values = state
+        super().setstate(state)
+        self.values = list(values)
+
+    def refill(self) -> list:
+        bits = random.Random.getrandbits(self, 64 * self.block)
+        values = memoryview(bits.to_bytes(8 * self.block, "little")).cast("Q")
+        if sys.byteorder == "big":  # the words are little-endian, whatever the machine
+            values = array("Q", values)
+            values.byteswap()
+        self.values = values.tolist()
+        return self.values
+
+    def below(self, n) -> int:
+        """
+        A number in range(n): the top of the 64-bit product of a draw and n (Lemire's method,
+        without the rejection step: the bias is below n / 2**64).
+        """
+        return ((self.values or self.refill()).pop() * n) >> 64
+
+    def randint(self, a, b) -> int:
+        return a + ((self.values or self.refill()).pop() * (b - a + 1) >> 64)
+
+    def randrange(self, start, stop=None, step=1) -> int:
+        if stop is None and start > 0:  # the common case first
+            return (self.values or self.refill()).pop() * start >> 64
+        if step != 1:
+            return super().randrange(start, stop, step)
+        if stop is None:
+            start, stop = 0, start
+        if stop <= start:
+            raise ValueError(f"empty range for randrange({start}, {stop})")
+        return start + self.below(stop - start)
+
+    def choice(self, seq):
+        if not seq:
+            raise IndexError("Cannot choose from an empty sequence")
+        return seq[(self.values or self.refill()).pop() * len(seq) >> 64]
+
+
+def game_rng(master, index) -> BatchedRandom:
+    """
+    The random stream of game number 'index' of a run seeded with 'master': the same
+    game is played again, draw for draw, by asking for the same stream.
+    """
+    return BatchedRandom(stream_seed(master, index))
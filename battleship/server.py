@@ -0,0 +1,233 @@
+"""
+The asyncio game server and its load-test client.
+"""
+import asyncio
+import random
+import time
+from collections import Counter
+
+from .bitboard import BitBoard
+from .core import Board, BoardOutException, Dot
+from .events import Hit, InvalidShot, Miss, Sunk
+from .game import Game
+from .metrics import percentile
+from .players import HeatmapAI
+
+
+class SessionSink:
+    """
+    Turns the events of a network game into protocol lines, kept until flush()
+    hands them to the connection. The shots at the client's board are prefixed
+    with ENEMY; the refused shots of the computer are not reported.
+    """
+    WORDS = {Hit: "HIT", Sunk: "SUNK", Miss: "MISS"}
+
+    def __init__(self, writer, board):
+        self.writer = writer
+        self.board = board  # the computer's board, the one the client shoots at
+        self.lines = []
+
+    def emit(self, event):
+        kind = type(event)
+        if kind in self.WORDS:
+            prefix = "" if event.board is self.board else "ENEMY "
+            self.lines.append(f"{prefix}{self.WORDS[kind]} {event.cell.x} {event.cell.y}")
+        elif kind is InvalidShot and event.board is self.board:
+            self.lines.append(f"INVALID {event.error}")
+
+    def send(self, line):
+        self.lines.append(line)
+
+    def flush(self):
+        if self.lines:
+            self.writer.write(("\n".join(self.lines) + "\n").encode())
+            self.lines = []
+
+
+class GameServer:
+    """
+    Hosts many games against the computer in one asyncio event loop, over TCP or a Unix socket.
+
+    The protocol is line based, with 0-based coordinates as in the console game:
+      server: HELLO <size> <ship lengths, comma separated>, then TURN whenever the client may shoot
+      client: <x> <y> to shoot, BOARD to get both boards, QUIT to leave
+      server: HIT|SUNK|MISS <x> <y> for the client's shot, INVALID <reason> if it was refused,
+              ENEMY HIT|SUNK|MISS <x> <y> for the computer's shots, WIN|LOSE <moves> at the end,
+              BYE <reason> when the server closes the connection early
+    The replies of a turn are sent together and the session waits for the client to read them
+    before it reads the next line (backpressure). Sessions idle for 'idle_timeout' seconds are
+    closed. Computer players marked 'expensive' move in a thread pool so that the other
+    sessions carry on meanwhile.
+    """
+
+    def __init__(self, strategy=HeatmapAI, size=Board.MAX_COORD, board_class=BitBoard, pool=None,
+                 idle_timeout=300.0, max_sessions=10000, backlog=1024, executor=None):
+        self.strategy = strategy
+        self.size = size
+        self.generator = Game.generator(size, board_class)
+        self.generator.pool = pool
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.backlog = backlog  # connections waiting to be accepted
+        self.executor = executor  # None is asyncio's default thread pool
+        self.sessions = 0
+        self.games = 0
+
+    async def serve(self, host="127.0.0.1", port=8765, path=None):
+        """
+        Serves until cancelled, on the Unix socket 'path' if given, or else on host:port.
+        """
+        if path is not None:
+            server = await asyncio.start_unix_server(self.handle, path, backlog=self.backlog)
+        else:
+            server = await asyncio.start_server(self.handle, host, port, backlog=self.backlog)
+        async with server:
+            await server.serve_forever()
+
+    async def handle(self, reader, writer):
+        try:
+            if self.sessions >= self.max_sessions:
+                writer.write(b"BYE busy\n")
+                await writer.drain()
+                return
+            self.sessions += 1
+            try:
+                await self.session(reader, writer)
+            finally:
+                self.sessions -= 1
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def session(self, reader, writer):
+        human_board = self.generator.new_board()
+        computer_board = self.generator.new_board()
+        computer_board.hidden = True
+        sink = SessionSink(writer, computer_board)
+        human_board.events = computer_board.events = sink
+        ai = self.strategy(computer_board, human_board)
+        lengths = ",".join(str(ship.length) for ship in computer_board.ships)
+        sink.send(f"HELLO {self.size} {lengths}")
+        sink.send("TURN")
+        moves = 0
+
+        while True:
+            sink.flush()
+            await writer.drain()
+            try:
+                line = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+            except asyncio.TimeoutError:
+                sink.send("BYE idle")
+                break
+            except ValueError:  # a line longer than the stream limit
+                sink.send("BYE line too long")
+                break
+            if not line:
+                return  # the client went away
+            command = line.decode(errors="replace").split()
+
+            if command == ["QUIT"]:
+                sink.send("BYE quit")
+                break
+            if command == ["BOARD"]:
+                sink.lines.extend(str(human_board).splitlines())
+                sink.lines.extend(str(computer_board).splitlines())
+                sink.send("TURN")
+                continue
+            if len(command) != 2 or not all(word.isdecimal() for word in command):
+                sink.send("INVALID Enter both coordinates!")
+                sink.send("TURN")
+                continue
+
+            x, y = int(command[0]), int(command[1])
+            if x >= self.size or y >= self.size:  # refused before it's interned as a Dot
+                sink.emit(InvalidShot(computer_board, None, BoardOutException()))
+                sink.send("TURN")
+                continue
+            outcome = computer_board.fire(Dot(x, y))
+            if not outcome.valid:
+                sink.send("TURN")
+                continue
+            repeat = outcome.hit
+            moves += 1
+            if computer_board.game_over:
+                sink.send(f"WIN {moves}")
+                break
+
+            while not repeat:  # the client missed: the computer shoots until it misses too
+                if ai.expensive:
+                    hit = await asyncio.get_running_loop().run_in_executor(self.executor, ai.move)
+                else:
+                    hit = ai.move()
+                moves += 1
+                if not hit or human_board.game_over:
+                    break
+            if human_board.game_over:
+                sink.send(f"LOSE {moves}")
+                break
+            sink.send("TURN")
+
+        self.games += 1
+        sink.flush()
+        await writer.drain()
+
+
+async def play_client(host, port, path, latencies) -> str:
+    """
+    A client that shoots at every cell in random order until the game is over.
+    Records the time from every shot to the server's answer (the computer's turn included)
+    in 'latencies' and returns the last line received.
+    """
+    if path is not None:
+        reader, writer = await asyncio.open_unix_connection(path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    try:
+        hello = (await reader.readline()).split()
+        if not hello or hello[0] != b"HELLO":
+            return b" ".join(hello).decode()
+        size = int(hello[1])
+        cells = random.sample(range(size * size), size * size)
+        started = None
+        while True:
+            line = await reader.readline()
+            if line.startswith((b"TURN", b"WIN", b"LOSE")) and started is not None:
+                latencies.append(time.perf_counter() - started)
+            if line.startswith(b"TURN"):
+                c = cells.pop()
+                started = time.perf_counter()
+                writer.write(f"{c // size} {c % size}\n".encode())
+                await writer.drain()
+            elif not line or line.startswith((b"WIN", b"LOSE", b"BYE")):
+                return line.decode().strip()
+    finally:
+        writer.close()
+
+
+async def load_test(host="127.0.0.1", port=8765, path=None, clients=1000, concurrency=500) -> str:
+    """
+    Plays 'clients' games against a running GameServer, 'concurrency' of them at a time,
+    and sums up the results and the round trip times.
+    """
+    gate = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with gate:
+            try:
+                return await play_client(host, port, path, latencies)
+            except OSError as e:
+                return f"ERROR {e}"
+
+    started = time.perf_counter()
+    endings = await asyncio.gather(*(one() for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+    outcomes = Counter(ending.split()[0] if ending else "EOF" for ending in endings)
+    latencies.sort()
+    return "\n".join([
+        f"{clients} games in {elapsed:.2f}s ({clients / elapsed:.1f} games/sec), {len(latencies)} shots",
+        ", ".join(f"{word}: {count}" for word, count in sorted(outcomes.items())),
+        f"Round trip: p50 {percentile(latencies, 50) * 1000:.2f}ms, "
+        f"p99 {percentile(latencies, 99) * 1000:.2f}ms" if latencies else "No shots",
+    ])
@@ -0,0 +1,358 @@
+"""
+Laying fleets out: feasibility, exact solving and random sampling.
+"""
+import random
+from collections import Counter, OrderedDict
+
+from . import metrics
+from .core import Board, Dot, Ship
+from .placement import placement_table
+
+
+class _OverLimit(Exception):
+    """
+    Raised inside count_layouts() when the count grows past 'count_limit' states.
+    """
+
+
+class FleetSolver:
+    """
+    Exact placement of a fleet (a multiset of ship lengths) on a size x size board.
+
+    The legal placements of every ship length come from the placement tables. A layout is
+    valid when no body touches the stroke of another ship, which is the rule Board.place_ship
+    enforces.
+
+    feasible() decides whether the fleet fits at all (memoized for the last 'memo_capacity'
+    fleets, and within 'search_limit' placements of the search),
+    pack() lays it out without any search when there is plenty of room, solve() builds a valid layout by backtracking with forward checking, and
+    sample() draws a layout uniformly among all valid layouts, by rejection or from the
+    exact count of the layouts (count_layouts()) when the fleet is too dense for rejection.
+    """
+    _feasible = OrderedDict()  # memo_key() -> bool, shared by all solvers, least recently used first
+    memo_capacity = 4096
+    search_limit = 100000  # placements tried by feasible() before giving the fleet up as not fitting
+    _counts = OrderedDict()  # memo_key() -> the memoized layout count of the fleet, None when over the limit
+    count_capacity = 4  # some 150 bytes per state counted
+    count_limit = 500000  # states counted by count_layouts() before giving the fleet up
+    count_cells = 400  # boards bigger than 20x20 are not counted at all
+
+    def __init__(self, size, lengths):
+        self.size = size
+        self.fleet = tuple(sorted(lengths, reverse=True))  # longest ships are placed first
+        self.placements = {length: placement_table(size, length) for length in set(self.fleet)}
+        self.exhausted = False  # whether the last solve() ran out of its budget
+
+    def fits_area(self) -> bool:
+        """
+        A quick necessary condition: a ship of length L with the stroke cells below and to
+        the right of it covers an (L + 1) x 2 block of the (size + 1) x (size + 1) board,
+        and these blocks never overlap.
+        """
+        return sum(2 * (length + 1) for length in self.fleet) <= (self.size + 1) ** 2
+
+    def feasible(self) -> bool:
+        """
+        Whether the fleet fits on the board. A fleet the search can neither lay out nor rule
+        out in 'search_limit' placements counts as not fitting (the "solver.undecided" metric
+        counts these), so that the answer takes about a second at most.
+        """
+        key = self.memo_key(self.size, self.fleet)
+        known = FleetSolver._feasible.get(key)
+        if known is None:
+            # most fleets are proven feasible by packing or a quick random placement, the search settles the rest
+            fits = self.fits_area() and (
+                self.pack() is not None or self.place_randomly(attempts=200) is not None
+                or self.solve(shuffle=None, limit=self.search_limit) is not None)
+            if not fits and self.exhausted:
+                metrics.METRICS.count("solver.undecided")
+            FleetSolver._feasible[key] = known = fits
+            if len(FleetSolver._feasible) > self.memo_capacity:
+                FleetSolver._feasible.popitem(last=False)
+        FleetSolver._feasible.move_to_end(key)
+        return known
+
+    @staticmethod
+    def memo_key(size, lengths) -> tuple:
+        """
+        The key of a fleet in the feasibility memo: the number of ships of every length,
+        which stays small however many ships the fleet of a big board has.
+        """
+        return size, tuple(sorted(Counter(lengths).items()))
+
+    @classmethod
+    def fits(cls, size, lengths) -> bool:
+        """
+        feasible() of the fleet, without making a solver when the answer is memoized.
+        """
+        known = cls._feasible.get(cls.memo_key(size, lengths))
+        return cls(size, lengths).feasible() if known is None else known
+
+    def pack(self):
+        """
+        Lays the ships side by side along every other row, longest first, each one in the
+        first row with room for it. Returns the layout, or None if they don't all fit this way
+        (they may still fit otherwise). Takes time in the number of ships, not the board area,
+        so it settles the big fleets of big boards.
+        """
+        size = self.size
+        set_aside = {}  # room left -> (x, y of the next bow) of the rows set aside with that room
+        layout = []
+        x, y = 0, 0  # the row being filled
+        for length in self.fleet:
+            spot = None
+            for room in sorted(set_aside):
+                if room >= length and set_aside[room]:
+                    spot = set_aside[room].pop()
+                    break
+            if spot is None:
+                if size - y < length:  # set the row aside and start the next but one
+                    if size - y > 0:
+                        set_aside.setdefault(size - y, []).append((x, y))
+                    x, y = x + 2, 0
+                    if x >= size or length > size:
+                        return None
+                spot = (x, y)
+                y += length + 1
+            else:
+                room = size - (spot[1] + length + 1)
+                if room > 0:
+                    set_aside.setdefault(room, []).append((spot[0], spot[1] + length + 1))
+            layout.append((length, spot[0], spot[1], 1 if length > 1 else 0))
+        return layout
+
+    def place_randomly(self, rng=random, attempts=1000):
+        """
+        Places the ships one by one at random bows, retrying a ship when it clashes with
+        the ones already placed, like Game.gen_ships does. Returns the layout, or None
+        after 'attempts' placements.
+        """
+        blocked = 0
+        layout = []
+        fleet = self.fleet
+        for _ in range(attempts):
+            if len(layout) == len(fleet):
+                break
+            table = self.placements[fleet[len(layout)]]
+            x, y, orientation, body, stroked = table[rng.randrange(len(table))]
+            if not body & blocked:
+                blocked |= stroked
+                layout.append((fleet[len(layout)], x, y, orientation))
+        return layout if len(layout) == len(fleet) else None
+
+    def solve(self, shuffle=random.shuffle, limit=None):
+        """
+        Returns a valid layout as a list of (length, x, y, orientation), or None if there is
+        none (or if more than 'limit' placements were tried, which sets 'exhausted'). With
+        'shuffle', the candidate placements are tried in random order, so the layout is random
+        (but not uniform).
+        """
+        self.exhausted = False
+        if not self.fits_area():
+            return None
+        if shuffle is not None and limit is None:
+            # some random orders take a very long search: restart with a new order and a doubled budget
+            if not self.feasible():
+                return None
+            limit = 100
+            while True:
+                layout = self.solve(shuffle, limit)
+                if layout is not None:
+                    return layout
+                limit *= 2
+        order = {}
+        for length, placements in self.placements.items():
+            order[length] = list(placements)
+            if shuffle is not None:
+                shuffle(order[length])
+
+        fleet = self.fleet
+        failed = set()  # (blocked, ship number, first candidate) states known to fail
+        layout = []
+        budget = [limit]
+
+        def fits_rest(blocked, start) -> bool:
+            """
+            Forward check: every remaining length has at least as many free placements
+            as ships of that length still to place.
+            """
+            needed = {}
+            for length in fleet[start:]:
+                needed[length] = needed.get(length, 0) + 1
+            for length, count in needed.items():
+                for placement in order[length]:
+                    if not placement[3] & blocked:
+                        count -= 1
+                        if count == 0:
+                            break
+                else:
+                    return False
+            return True
+
+        def place(blocked, ship, first) -> bool:
+            if ship == len(fleet):
+                return True
+            if (blocked, ship, first) in failed or not fits_rest(blocked, ship):
+                return False
+
+            length = fleet[ship]
+            candidates = order[length]
+            for i in range(first, len(candidates)):
+                x, y, orientation, body, stroked = candidates[i]
+                if body & blocked:
+                    continue
+                if budget[0] is not None:
+                    budget[0] -= 1
+                    if budget[0] < 0:
+                        return False
+                layout.append((length, x, y, orientation))
+                # ships of the same length are interchangeable: the next one only takes later candidates
+                following = i + 1 if ship + 1 < len(fleet) and fleet[ship + 1] == length else 0
+                if place(blocked | stroked, ship + 1, following):
+                    return True
+                layout.pop()
+
+            if budget[0] is None or budget[0] >= 0:
+                failed.add((blocked, ship, first))
+            return False
+
+        if place(0, 0, 0):
+            return layout
+        self.exhausted = budget[0] is not None and budget[0] < 0
+        return None
+
+    def count_layouts(self):
+        """
+        The number of valid layouts of the fleet, or None if counting them takes more than
+        'count_limit' states (which sets 'exhausted').
+
+        The count goes cell by cell in raster order: at every cell either no ship has its bow
+        there, or one of the ships still to place does, in any of its placements that start on
+        that cell. A state is the cell, the ships still to place and the cells blocked from that
+        cell on, and the counts of the states are memoized for the last 'count_capacity' fleets,
+        so the next sample() of the same fleet doesn't count again. The states stay few on
+        boards up to about 8x8; the big fleets of big boards are over the limit.
+        """
+        counter = self._counter()
+        return None if counter is None else counter[0](0, counter[1], 0)
+
+    def _counter(self):
+        """
+        The memoized count function of the fleet and the ships of every length to place,
+        or None when the fleet is over the limit.
+        """
+        key = self.memo_key(self.size, self.fleet)
+        if key in FleetSolver._counts:
+            FleetSolver._counts.move_to_end(key)
+            counter = FleetSolver._counts[key]
+        else:
+            counter = self._count() if self.size * self.size <= self.count_cells else None
+            FleetSolver._counts[key] = counter
+            if len(FleetSolver._counts) > self.count_capacity:
+                FleetSolver._counts.popitem(last=False)
+        self.exhausted = counter is None
+        return counter
+
+    def _count(self):
+        cells = self.size * self.size
+        lengths = sorted(set(self.fleet), reverse=True)
+        starts = [[[] for _ in lengths] for _ in range(cells)]  # cell -> length -> (body, stroked, ship) from that cell
+        for k, length in enumerate(lengths):
+            for x, y, orientation, body, stroked in self.placements[length]:
+                cell = (body & -body).bit_length() - 1
+                starts[cell][k].append((body >> cell, stroked >> cell, (length, x, y, orientation)))
+        memo = {}
+
+        def moves(cell, left, used):
+            """
+            The ways to go on from a cell: (ships left, blocked cells from the next cell on,
+            the ship with its bow on this cell or None). 'used' has the cell in bit 0.
+            """
+            yield left, used >> 1, None
+            if not used & 1:
+                for k, options in enumerate(starts[cell]):
+                    if left[k]:
+                        rest = left[:k] + (left[k] - 1,) + left[k + 1:]
+                        for body, stroked, ship in options:
+                            if not body & used:
+                                yield rest, (used | stroked) >> 1, ship
+
+        def count(cell, left, used) -> int:
+            if not any(left):
+                return 1
+            if cell == cells:
+                return 0
+            key = (cell, left, used)
+            n = memo.get(key)
+            if n is None:
+                if len(memo) >= self.count_limit:
+                    raise _OverLimit
+                n = 0
+                for rest, after, _ in moves(cell, left, used):
+                    n += count(cell + 1, rest, after)
+                memo[key] = n
+            return n
+
+        left = tuple(self.fleet.count(length) for length in lengths)
+        try:
+            count(0, left, 0)
+        except _OverLimit:
+            return None
+        return count, left, moves
+
+    def sample(self, rng=random, attempts=2000):
+        """
+        Draws a layout uniformly among all valid layouts of the fleet. Returns None if the
+        fleet doesn't fit, or if it is too dense to draw from (which sets 'exhausted').
+
+        First by rejection: every ship picks one of all its placements uniformly and the whole
+        layout is thrown away on the first clash, so every valid layout has the same chance.
+        Dense fleets almost never come out that way, so after 'attempts' tries the layouts are
+        counted (count_layouts()) and one is drawn by its number: going cell by cell, every way
+        to go on is taken with a chance proportional to the layouts that follow it.
+        """
+        fleet = self.fleet
+        placements = self.placements
+        for _ in range(attempts):
+            blocked = 0
+            layout = []
+            for length in fleet:
+                x, y, orientation, body, stroked = rng.choice(placements[length])
+                if body & blocked:
+                    break
+                blocked |= stroked
+                layout.append((length, x, y, orientation))
+            else:
+                return layout
+
+        counter = self._counter() if self.fits_area() else None
+        if counter is None:
+            return None
+        count, left, moves = counter
+        number = count(0, left, 0)
+        if number == 0:
+            return None
+        number = rng.randrange(number)
+        layout = []
+        cell, used = 0, 0
+        while any(left):
+            for rest, after, ship in moves(cell, left, used):
+                n = count(cell + 1, rest, after)
+                if number < n:
+                    break
+                number -= n
+            if ship is not None:
+                layout.append(ship)
+            cell, left, used = cell + 1, rest, after
+        layout.sort(key=lambda ship: -ship[0])  # longest first, as in the fleet
+        return layout
+
+    def board(self, layout, board_class=Board, **kwargs) -> Board:
+        """
+        Builds a ready-to-play board from a layout returned by solve() or sample().
+        """
+        board = board_class(size=self.size, **kwargs)
+        for length, x, y, orientation in layout:
+            board.place_ship(Ship(length, Dot(x, y), orientation))
+        board.begin()
+        return board
@@ -0,0 +1,64 @@
+"""
+The board for very large grids, storing only what is on it.
+"""
+from .core import Board
+from .zobrist import ComputedKeys
+
+
+class SparseRow(dict):
+    """
+    One row of a SparseGrid: the cells that were set, by column; the others read as 'default'.
+    """
+    __slots__ = ("default",)
+
+    def __init__(self, default):
+        super().__init__()
+        self.default = default
+
+    def __missing__(self, y):
+        return self.default
+
+
+class SparseGrid(dict):
+    """
+    A size x size grid indexed as grid[x][y], like the nested lists of Board,
+    that only stores the cells that were set. A row is created on first access.
+    """
+    __slots__ = ("default",)
+
+    def __init__(self, default):
+        super().__init__()
+        self.default = default
+
+    def __missing__(self, x) -> SparseRow:
+        row = self[x] = SparseRow(self.default)
+        return row
+
+
+class SparseBoard(Board):
+    """
+    The same board as Board for grids of 1000 x 1000 and beyond: the grid and the ship
+    owners only hold the cells with a ship, a shot or a stroke, so memory follows the
+    fleet and the shots, not the area.
+
+    Printing shows the region 'window' (the top left VIEW_SIZE x VIEW_SIZE cells by default);
+    move it, or use view(), to see another part of the board.
+    """
+    VIEW_SIZE = 30
+
+    def __init__(self, hidden=False, size=Board.MAX_COORD, events=None):
+        super().__init__(hidden, size, events)
+        view = min(size, SparseBoard.VIEW_SIZE)
+        self.window = (0, 0, view, view)
+
+    def zobrist_keys(self) -> ComputedKeys:
+        return ComputedKeys()
+
+    def new_grid(self, default) -> SparseGrid:
+        return SparseGrid(default)
+
+    def row_cells(self, x, left, width) -> list:
+        row = self.grid.get(x)
+        if row is None:
+            return [self.grid.default] * width
+        return [row[y] for y in range(left, left + width)]
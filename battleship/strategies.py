@@ -0,0 +1,20 @@
+"""
+The computer players by name, for the command line and the server, without importing them.
+"""
+import importlib
+
+STRATEGIES = {
+    "random": "battleship.players:AI",
+    "heatmap": "battleship.players:HeatmapAI",
+    "heatmap-numpy": "battleship.numpy_players:NumpyHeatmapAI",
+    "montecarlo": "battleship.players:MonteCarloAI",
+    "endgame": "battleship.players:EndgameAI",
+}  # the computer players available by name, as "module:class" so a player's modules are only imported when needed
+
+
+def load_strategy(name) -> type:
+    """
+    The Player class of a strategy in STRATEGIES.
+    """
+    module, _, cls = STRATEGIES[name].partition(":")
+    return getattr(importlib.import_module(module), cls)
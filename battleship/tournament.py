@@ -0,0 +1,134 @@
+"""
+Strategies against each other over many games, in a process pool.
+"""
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .bitboard import BitBoard
+from .core import Board
+from .game import Simulation
+from .metrics import percentile
+from .players import MonteCarloAI
+
+
+def play_shard(players, size, board_class, games, seed, start) -> list:
+    """
+    Plays the games number 'start' to 'start + games - 1' of a tournament match in a worker
+    process. Every game has its own random stream from the seed of the match, so each one
+    is reproducible whatever the shards. Returns the GameResults.
+
+    The tournament is parallel already, so MonteCarloAI samples in the process that plays:
+    a process pool of its own in every worker would only fight for the same cores (and can
+    hang the worker on exit), and its draws would depend on the number of workers.
+    """
+    workers, MonteCarloAI.workers = MonteCarloAI.workers, 1
+    try:
+        return Simulation(players, size, board_class, seed=seed).run(games, start).results
+    finally:
+        MonteCarloAI.workers = workers
+
+
+def wilson_interval(wins, games, z=1.96) -> tuple:
+    """
+    The Wilson score interval of a win rate (95% by default).
+    """
+    if not games:
+        return 0.0, 1.0
+    rate = wins / games
+    centre = rate + z * z / (2 * games)
+    spread = z * (rate * (1 - rate) / games + z * z / (4 * games * games)) ** 0.5
+    return (centre - spread) / (1 + z * z / games), (centre + spread) / (1 + z * z / games)
+
+
+class MatchReport:
+    """
+    The results of all games between two strategies.
+    """
+
+    def __init__(self, names, results) -> None:
+        self.names = names
+        self.results = results
+
+    @property
+    def games(self) -> int:
+        return len(self.results)
+
+    def wins(self, player) -> int:
+        return sum(1 for r in self.results if r.winner == player)
+
+    def win_rate(self, player) -> float:
+        return self.wins(player) / self.games if self.games else 0.0
+
+    def __str__(self):
+        if not self.games:
+            return f"{self.names[0]} vs {self.names[1]}: no games"
+        moves = [r.moves for r in self.results]
+        low, high = wilson_interval(self.wins(0), self.games)
+        return (f"{self.names[0]} vs {self.names[1]}: {self.games} games, "
+                f"{self.names[0]} wins {self.win_rate(0):.1%} (95% CI {low:.1%}-{high:.1%})\n"
+                f"  moves per game: mean {sum(moves) / len(moves):.1f}, p50 {percentile(moves, 50)}, "
+                f"p90 {percentile(moves, 90)}, p99 {percentile(moves, 99)}")
+
+
+class Tournament:
+    """
+    Plays every pair of strategies against each other (a single strategy plays itself).
+
+    'strategies' maps names to Player classes. Every match of 'games' games is cut into
+    shards of 'shard_size' games; the shards run in a process pool of 'workers' processes
+    and every game has its own random stream derived from 'seed', the match and the game
+    number, so a tournament is reproducible whatever the number of workers and the shards,
+    and any game of it can be played again alone. 'progress' is called with (games done, games in total,
+    match names) every time a shard finishes.
+    """
+
+    def __init__(self, strategies, games, size=Board.MAX_COORD, board_class=BitBoard,
+                 workers=os.cpu_count() or 1, seed=0, shard_size=50):
+        self.strategies = strategies
+        self.games = games
+        self.size = size
+        self.board_class = board_class
+        self.workers = workers
+        self.seed = seed
+        self.shard_size = shard_size + shard_size % 2  # even, so that both players start equally often
+
+    def matches(self) -> list:
+        names = list(self.strategies)
+        return list(itertools.combinations(names, 2)) if len(names) > 1 else [(names[0], names[0])]
+
+    def shards(self) -> list:
+        """
+        (match, shard args) for every shard of the tournament.
+        """
+        shards = []
+        for m, names in enumerate(self.matches()):
+            players = tuple(self.strategies[name] for name in names)
+            for start in range(0, self.games, self.shard_size):
+                games = min(self.shard_size, self.games - start)
+                shards.append((names, (players, self.size, self.board_class, games, self.seed * 1000003 + m, start)))
+        return shards
+
+    def run(self, progress=None) -> list:
+        shards = self.shards()
+        results = {names: [] for names in self.matches()}
+        done, total = 0, sum(args[3] for _, args in shards)
+
+        if self.workers <= 1:
+            finished = ((names, play_shard(*args)) for names, args in shards)
+        else:
+            executor = ProcessPoolExecutor(max_workers=self.workers)
+            futures = {executor.submit(play_shard, *args): names for names, args in shards}
+            finished = ((futures[future], future.result()) for future in as_completed(futures))
+
+        try:
+            for names, shard in finished:
+                results[names].extend(shard)
+                done += len(shard)
+                if progress is not None:
+                    progress(done, total, names)
+        finally:
+            if self.workers > 1:
+                executor.shutdown()
+
+        return [MatchReport(names, games) for names, games in results.items()]
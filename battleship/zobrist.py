@@ -0,0 +1,79 @@
+"""
+Zobrist hashing of what a player knows about a board, and the transposition table it keys.
+"""
+from collections import OrderedDict
+
+MISS, HIT, SUNK = range(3)  # what a shot revealed about a cell; cell c in state s has the key number c * 3 + s
+
+_tables = {}  # board size -> list of keys
+
+
+def zobrist_key(i) -> int:
+    """
+    The 64-bit key number i: the SplitMix64 mix of i, so the keys are the same in every
+    process and don't need a table to be computed.
+    """
+    z = (i * 0x9E3779B97F4A7C15 + 0x632BE59BD9B4E019) & 0xFFFFFFFFFFFFFFFF
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+    return z ^ (z >> 31)
+
+
+def zobrist_keys(size) -> list:
+    """
+    The keys of the cell states of a size x size board, computed once per size.
+    """
+    keys = _tables.get(size)
+    if keys is None:
+        keys = _tables[size] = [zobrist_key(i) for i in range(3 * size * size)]
+    return keys
+
+
+class ComputedKeys:
+    """
+    The keys of zobrist_keys(), computed on every lookup instead of kept in a list:
+    for the boards too big to hold three keys per cell.
+    """
+
+    def __getitem__(self, i) -> int:
+        return zobrist_key(i)
+
+
+class TranspositionTable:
+    """
+    Search results by Zobrist hash (or by a key made of one), so that a state of knowledge
+    reached by different orders of the same shots is evaluated once.
+
+    Holds at most 'capacity' entries and forgets the least recently used one when full.
+    """
+
+    def __init__(self, capacity=1 << 16):
+        self.capacity = capacity
+        self.entries = OrderedDict()  # key -> result, least recently used first
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        """
+        The result stored for 'key', or None.
+        """
+        result = self.entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put(self, key, result):
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = self.misses = 0
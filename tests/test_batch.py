@@ -0,0 +1,50 @@
+"""
+BatchEngine against Simulation: the same fleets and the same shots play the same games.
+"""
+import random
+
+import pytest
+
+from battleship.core import Dot
+from battleship.game import Game, Simulation
+from battleship.players import Player
+from battleship.solver import FleetSolver
+
+numpy = pytest.importorskip("numpy")
+from battleship.batch import BatchEngine  # noqa: E402
+
+
+def test_batch_plays_by_the_rules_of_board():
+    size = 10
+    generator = Game.generator(size, rng=random.Random(5))
+    layouts = []
+    for _ in range(8):
+        board = generator.forced_gen_ships()
+        layouts.append([(ship.length, ship.bow.x, ship.bow.y, ship.orientation) for ship in board.ships])
+
+    shots = []  # (board shot at, cell) in the order the engine fires them
+
+    def recorded_shots(engine, lanes, boards):
+        cells = BatchEngine.random_shots(engine, lanes, boards)
+        shots.extend(zip(boards.tolist(), cells.tolist()))
+        return cells
+
+    engine = BatchEngine(1, size, seed=5, policy=recorded_shots, generator=iter(layouts).__next__)
+    batch = engine.run(len(layouts) // 2).results
+
+    class Replayed(Simulation):
+        def new_board(self):
+            self.boards = getattr(self, "boards", [])[-1:] + [FleetSolver(size, []).board(layouts.pop(0))]
+            return self.boards[-1]
+
+    fired = iter(shots)
+
+    class Recorded(Player):
+        def ask(self) -> Dot:
+            board, cell = next(fired)
+            assert self.opponent is simulation.boards[board]  # the same player has the turn
+            return Dot(*divmod(cell, size))
+
+    simulation = Replayed((Recorded, Recorded), size)
+    assert simulation.run(len(batch)).results == batch
+    assert next(fired, None) is None
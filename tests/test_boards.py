@@ -0,0 +1,87 @@
+"""
+The board classes: the same shots give the same boards, and make() can be taken back.
+"""
+import random
+
+import pytest
+
+from battleship.bitboard import BitBoard
+from battleship.core import Board, Dot
+from battleship.game import Game
+from battleship.players import TargetPool
+from battleship.solver import FleetSolver
+from battleship.sparse import SparseBoard
+
+
+def state(board) -> tuple:
+    """
+    Everything a shot can change, as seen through the public API.
+    """
+    cells = [Dot(x, y) for x in range(board.size) for y in range(board.size)]
+    return (board.zobrist, board.sunk_ships, [ship.hp for ship in board.ships], board.open_cells(),
+            [board.used(cell) for cell in cells], board.view(hidden=False), board.view(hidden=True),
+            board.game_over)
+
+
+@pytest.mark.parametrize("board_class", [BitBoard, SparseBoard])
+def test_board_classes_agree(board_class):
+    """
+    The same shots on the same fleet leave a board class in the same state as Board.
+    """
+    layout = Game.generator(10, Board, random.Random(7)).forced_gen_ships()
+    fleet = [(ship.length, ship.bow.x, ship.bow.y, ship.orientation) for ship in layout.ships]
+    board, other = (FleetSolver(10, []).board(fleet, cls) for cls in (Board, board_class))
+    rng = random.Random(8)
+    while not board.game_over:
+        cell = Dot(*divmod(rng.choice(board.open_cells()), 10))
+        assert board.fire(cell) is other.fire(cell)
+        assert state(other) == state(board)
+    assert other.game_over
+
+
+@pytest.mark.parametrize("board_class", [Board, BitBoard, SparseBoard])
+@pytest.mark.parametrize("seed", range(3))
+def test_restore_undoes_every_shot(board_class, seed):
+    rng = random.Random(seed)
+    board = Game.generator(10, board_class, rng).forced_gen_ships()
+    before = state(board)
+    mark = board.snapshot()
+
+    states = []
+    while not board.game_over:
+        states.append(state(board))
+        board.make(Dot(*divmod(rng.choice(board.open_cells()), board.size)))
+    assert board.sunk_ships == len(board.ships)
+
+    for expected in reversed(states[len(states) // 2:]):  # half the way back one shot at a time
+        board.unmake()
+        assert state(board) == expected
+    board.restore(mark)
+    assert state(board) == before
+    assert board.zobrist == 0 and not board.journal
+
+
+@pytest.mark.parametrize("board_class", [Board, BitBoard, SparseBoard])
+def test_target_pool_follows_the_board(board_class):
+    """
+    A TargetPool holds the open cells of its board through shots, sinks and unmake().
+    """
+    rng = random.Random(4)
+    board = Game.generator(10, board_class, rng).forced_gen_ships()
+    pool = TargetPool(board)
+
+    def check():
+        assert sorted(pool.cells) == board.open_cells()
+        assert all(pool.position[c] == i for i, c in enumerate(pool.cells))
+        assert pool.position.count(-1) == board.size * board.size - len(pool)
+
+    shots = 0
+    while not board.game_over:
+        board.make(Dot(*divmod(pool.draw(rng), board.size)))
+        shots += 1
+        check()
+    assert board.sunk_ships  # strokes were ruled out as well as shots
+    for _ in range(shots):
+        board.unmake()
+        check()
+    assert len(pool) == board.size * board.size
@@ -0,0 +1,32 @@
+"""
+The opening book: what is saved reads back the same.
+"""
+import random
+
+import pytest
+
+from battleship.book import OpeningBook
+
+
+def test_book_round_trip(tmp_path):
+    book = OpeningBook()
+    book.build(11, depth=3, samples=300, min_samples=20, rng=random.Random(0))
+    book.build(10, depth=2, samples=300, min_samples=20, rng=random.Random(1))
+    path = tmp_path / "book.bin"
+    book.save(path)
+
+    loaded = OpeningBook(path)
+    assert loaded.lookup(11, 0) == book.lookup(11, 0) != -1  # the first shot on an empty board
+    assert loaded.sections == book.sections
+    assert loaded.info == book.info
+    assert loaded.lookup(12, 0) == -1
+
+    loaded.save(tmp_path / "again.bin")
+    assert (tmp_path / "again.bin").read_bytes() == path.read_bytes()
+
+
+def test_book_rejects_other_files(tmp_path):
+    path = tmp_path / "not-a-book.bin"
+    path.write_bytes(b"BSRL")
+    with pytest.raises(ValueError):
+        OpeningBook(path).lookup(10, 0)
@@ -0,0 +1,57 @@
+"""
+EndgameAI against a brute-force count of the layouts on a small board.
+"""
+import itertools
+import random
+
+import pytest
+
+from battleship.core import Board
+from battleship.game import Game
+from battleship.placement import placement_table
+from battleship.players import EndgameAI
+
+
+def brute_force_counts(ai) -> list:
+    """
+    For every cell, the number of layouts of the ships afloat that agree with what the AI
+    knows and put a ship on the cell, by trying every combination of placements.
+    """
+    size = ai.size
+    counts = [0] * (size * size)
+    tables = [placement_table(size, length) for length in ai.afloat]
+    for layout in itertools.product(*tables):
+        bodies = 0
+        for i, (_, _, _, body, _) in enumerate(layout):
+            if body & ai.blocked or any(body & other[4] for other in layout[:i]):
+                break
+            bodies |= body
+        else:
+            if bodies & ai.hit_mask == ai.hit_mask:
+                for c in range(size * size):
+                    if bodies >> c & 1:
+                        counts[c] += 1
+    return counts
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_endgame_picks_a_most_likely_cell(seed):
+    rng = random.Random(seed)
+    generator = Game.generator(7, rng=rng)
+    opponent = generator.forced_gen_ships([3, 2, 2, 1, 1])
+    ai = EndgameAI(Board(size=7), opponent, rng)
+    ai.time_budget = 60  # the answer must come from the search, never from the fallback
+
+    checked = 0
+    while not opponent.game_over:
+        if len(ai.afloat) <= ai.endgame_ships:
+            c = ai.endgame()
+            counts = brute_force_counts(ai)
+            best = max(count for cell, count in enumerate(counts) if not ai.shot[cell])
+            assert c != -1 and not ai.shot[c]
+            assert counts[c] == best > 0
+            hits = EndgameAI.table.hits
+            assert ai.endgame() == c and EndgameAI.table.hits == hits + 1  # the same state, from the table
+            checked += 1
+        ai.move()
+    assert checked
@@ -0,0 +1,29 @@
+"""
+NumpyPlacementDensity against PlacementDensity: the same counts and the same shots.
+"""
+import random
+
+import pytest
+
+from battleship.core import Board
+from battleship.game import Game
+from battleship.players import HeatmapAI
+from battleship.solver import FleetSolver
+
+numpy = pytest.importorskip("numpy")
+from battleship.numpy_players import NumpyHeatmapAI  # noqa: E402
+
+
+@pytest.mark.parametrize("size", [10, 13, 20])
+def test_numpy_density_matches(size):
+    layout = Game.generator(size, rng=random.Random(size)).forced_gen_ships()
+    fleet = [(ship.length, ship.bow.x, ship.bow.y, ship.orientation) for ship in layout.ships]
+    solver = FleetSolver(size, [])
+    players = [cls(Board(size=size), solver.board(fleet), random.Random(0)) for cls in (HeatmapAI, NumpyHeatmapAI)]
+    python, vectorized = players
+
+    while not python.opponent.game_over:
+        assert vectorized.density.density[:-1].tolist() == python.density.density
+        assert vectorized.ask() == python.ask()
+        assert vectorized.move() == python.move()
+    assert vectorized.opponent.game_over
@@ -0,0 +1,46 @@
+"""
+The replay log: what is written reads back the same and plays the same game again.
+"""
+import pytest
+
+from battleship.game import Simulation
+from battleship.players import HeatmapAI
+from battleship.replay import ReplayReader, ReplayRecorder, ReplayWriter, replay
+
+
+@pytest.mark.parametrize("size", [10, 17])  # one and two bytes per shot
+def test_replay_round_trip(tmp_path, size):
+    path = tmp_path / "games.bsrl"
+    with ReplayWriter(path) as writer:
+        simulation = Simulation((HeatmapAI, HeatmapAI), size, recorder=ReplayRecorder(writer), seed=size)
+        results = simulation.run(5).results
+
+    with ReplayReader(path) as reader:
+        games = list(reader)
+        assert len(reader) == len(results)
+        for game, result in zip(games, results):
+            assert (game.size, game.first, len(game.shots)) == (size, result.first, result.moves)
+            boards = replay(game)
+            assert boards[1 - result.winner].game_over and not boards[result.winner].game_over
+            for board, fleet in zip(boards, game.fleets):
+                assert [(ship.length, ship.bow.x, ship.bow.y, ship.orientation) for ship in board.ships] == fleet
+
+
+def test_replay_appends(tmp_path):
+    path = tmp_path / "games.bsrl"
+    for seed in (1, 2):
+        with ReplayWriter(path) as writer:
+            Simulation(recorder=ReplayRecorder(writer), seed=seed).run(3)
+    with ReplayReader(path) as reader:
+        assert len(reader) == 6
+
+
+@pytest.mark.parametrize("content", [b"", b"BS", b"BSOB\x01"])
+def test_replay_rejects_other_files(tmp_path, content):
+    path = tmp_path / "not-a-log.bsrl"
+    path.write_bytes(content)
+    with pytest.raises(ValueError):
+        ReplayReader(path)
+    if content:  # the writer starts a new log in an empty file
+        with pytest.raises(ValueError):
+            ReplayWriter(path)
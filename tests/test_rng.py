@@ -0,0 +1,23 @@
+"""
+The random streams: the same on every machine, and one per game of a seeded run.
+"""
+import random
+
+from battleship.game import Simulation
+from battleship.players import HeatmapAI
+from battleship.rng import BatchedRandom
+
+
+def test_batched_random_words():
+    """
+    A block holds the 64-bit words of the Mersenne Twister's bits, lowest first.
+    """
+    bits = random.Random(5).getrandbits(64 * 16)
+    assert BatchedRandom(5, block=16).refill() == [bits >> (64 * i) & (1 << 64) - 1 for i in range(16)]
+
+
+def test_start_replays_the_same_games():
+    players = (HeatmapAI, HeatmapAI)
+    whole = Simulation(players, seed=3).run(6).results
+    assert Simulation(players, seed=3).run(4, start=2).results == whole[2:]
+    assert Simulation(players, seed=3).run(1, start=5).results == whole[5:]
@@ -0,0 +1,52 @@
+"""
+FleetSolver.sample against the list of every valid layout of a small fleet.
+"""
+import itertools
+import random
+from collections import Counter
+
+import pytest
+
+from battleship.game import Game
+from battleship.solver import FleetSolver
+
+
+def all_layouts(size, fleet) -> set:
+    """
+    Every valid layout of the fleet, as a sorted tuple of (length, x, y, orientation),
+    by trying every combination of placements.
+    """
+    solver = FleetSolver(size, fleet)
+    layouts = set()
+    for combination in itertools.product(*(solver.placements[length] for length in solver.fleet)):
+        if all(not body & other[4] for i, (_, _, _, body, _) in enumerate(combination) for other in combination[:i]):
+            layouts.add(tuple(sorted((length, x, y, orientation)
+                                     for length, (x, y, orientation, _, _) in zip(solver.fleet, combination))))
+    return layouts
+
+
+@pytest.mark.parametrize("attempts", [2000, 0])  # by rejection, and from the count alone
+def test_sample_is_uniform(attempts):
+    size, fleet = 4, [2, 2, 1, 1]
+    layouts = all_layouts(size, fleet)
+    solver = FleetSolver(size, fleet)
+    assert solver.count_layouts() == len(layouts)
+
+    rng = random.Random(attempts)
+    draws = 20 * len(layouts)
+    seen = Counter(tuple(sorted(solver.sample(rng, attempts))) for _ in range(draws))
+    assert set(seen) == layouts
+    expected = draws / len(layouts)
+    chi2 = sum((n - expected) ** 2 / expected for n in seen.values())
+    assert chi2 < len(layouts) + 5 * (2 * len(layouts)) ** 0.5  # far in the tail of chi-square at df 171
+
+
+def test_uniform_game_boards():
+    generator = Game.generator(6, rng=random.Random(3))
+    generator.uniform = True
+    board = generator.forced_gen_ships([3, 2, 2, 1])
+    layout = FleetSolver(6, [3, 2, 2, 1]).sample(random.Random(3))
+    assert [(ship.length, ship.bow.x, ship.bow.y, ship.orientation) for ship in board.ships] == layout
+    assert len(generator.forced_gen_ships().ships) > 0  # a random fleet
+    with pytest.raises(ValueError):
+        generator.forced_gen_ships([4, 4, 4, 4, 4])